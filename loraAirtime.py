@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: airtime and best radio setting lookup tables
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    The airtime of a packet only depends on (sf, cr, pl, bw), so airtime()
+    remembers every value it computed.
+
+    For experiments 3 and 5 the scripts pick, per node, the (sf, bw) with the
+    shortest airtime among the settings whose sensitivity is below the
+    received power Prx. Which settings qualify only changes when Prx crosses
+    one of the 18 sensitivity values of the table, so BestSetting computes
+    the answer once for each of these power bands. resolve() then maps any
+    number of Prx values to their band with a single binary search. Ties are
+    broken as in the original loop: the first setting in (sf, bw) order wins.
+    The simulations resolve the packets of all nodes at once when they are
+    configured (Simulation.bestSettings()), experiment 5 then lowers the
+    transmit power of every packet with reduceTxPow().
+"""
+
+import math
+import numpy as np
+
+# bandwidths of the columns 1..3 of the sensitivity table
+bandwidths = [125, 250, 500]
+
+# computed airtimes, keyed by (sf, cr, pl, bw)
+airtimes = {}
+
+# this function computes the airtime of a packet
+# according to LoraDesignGuide_STD.pdf
+#
+def airtime(sf,cr,pl,bw):
+    key = (sf, cr, pl, bw)
+    at = airtimes.get(key)
+    if at is not None:
+        return at
+
+    H = 0        # implicit header disabled (H=0) or not (H=1)
+    DE = 0       # low data rate optimization enabled (=1) or not (=0)
+    Npream = 8   # number of preamble symbol (12.25  from Utz paper)
+
+    if bw == 125 and sf in [11, 12]:
+        # low data rate optimization mandated for BW125 with SF11 and SF12
+        DE = 1
+    if sf == 6:
+        # can only have implicit header with SF6
+        H = 1
+
+    Tsym = (2.0**sf)/bw
+    Tpream = (Npream + 4.25)*Tsym
+    payloadSymbNB = 8 + max(math.ceil((8.0*pl-4.0*sf+28+16-20*H)/(4.0*(sf-2*DE)))*(cr+4),0)
+    Tpayload = payloadSymbNB * Tsym
+    at = Tpream + Tpayload
+    airtimes[key] = at
+    return at
+
+#
+# airtime() of arrays of settings, element by element
+#
+def airtimeOf(sf, cr, pl, bw):
+    sf = np.asarray(sf, dtype=np.int64)
+    cr = np.asarray(cr, dtype=np.int64)
+    bw = np.asarray(bw, dtype=np.int64)
+    # one key per setting, bw is at most 500 kHz and cr at most 4
+    uniq, inv = np.unique((sf * 8 + cr) * 1024 + bw, return_inverse=True)
+    at = np.array([airtime(int(k // 8192), int(k // 1024 % 8), pl, int(k % 1024)) for k in uniq])
+    return at[inv.reshape(-1)]
+
+#
+# shortest-airtime setting per received power band
+#
+class BestSetting():
+    def __init__(self, sensi, cr, pl):
+        self.cr = cr
+        self.pl = pl
+        nsf = sensi.shape[0]
+        sens = np.asarray(sensi[:, 1:4], dtype=float)
+        sfs = np.asarray(sensi[:, 0], dtype=int)
+        at = np.array([[airtime(int(sfs[i]), cr, pl, bandwidths[j]) for j in range(0, 3)]
+                       for i in range(0, nsf)])
+        # band k: Prx is above exactly the k lowest sensitivity values
+        self.levels = np.unique(sens)
+        nb = len(self.levels) + 1
+        self.sf = np.zeros(nb, dtype=int)
+        self.bw = np.zeros(nb, dtype=int)
+        self.airtime = np.zeros(nb)
+        self.sensi = np.zeros(nb)
+        for k in range(1, nb):
+            usable = np.where(sens <= self.levels[k-1], at, np.inf)
+            # argmin returns the first minimum in (sf, bw) order
+            best = int(np.argmin(usable))
+            i, j = divmod(best, 3)
+            self.sf[k] = sfs[i]
+            self.bw[k] = bandwidths[j]
+            self.airtime[k] = at[i, j]
+            self.sensi[k] = sens[i, j]
+
+    # best settings for an array of Prx values, all nodes at once:
+    # (sf, bw, airtime, sensitivity), sf is 0 when the base station can not
+    # be reached
+    def resolve(self, prx):
+        k = np.searchsorted(self.levels, prx, 'left')
+        return self.sf[k], self.bw[k], self.airtime[k], self.sensi[k]
+
+# tables per (sensitivity table, cr, pl)
+tables = {}
+
+def bestSetting(sensi, cr, pl):
+    key = (np.asarray(sensi, dtype=float).tobytes(), cr, pl)
+    t = tables.get(key)
+    if t is None:
+        t = BestSetting(sensi, cr, pl)
+        tables[key] = t
+    return t
+
+#
+# experiment 5: reduce the txpower if there's room left
+#
+def reduceTxPow(txpow, prx, sensitivity):
+    return np.maximum(2, txpow - np.floor(prx - sensitivity))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: gain patterns of directional node antennae
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+
+ Mitigating Inter-Network Interference in LoRa Low-Power Wide-Area Networks,
+ Thiemo Voigt, Martin Bor, Utz Roedig, and Juan Alonso, EWSN '17
+"""
+
+"""
+ DESCRIPTION:
+    A directional node points its antenna at its own base station. The gain
+    towards a base station depends on the angle between that base station
+    and the own base station, seen from the node. gains() computes the gain
+    of every node - base station link at once from the coordinates,
+    linkGains() the gain of a list of single links.
+
+    Patterns, by name (the antenna scenario option):
+    step          the step table of the EWSN paper: dir_30 up to 30 degrees,
+                  dir_90 up to 90, dir_150 up to 150 and dir_180 beyond
+    interpolated  the same points, linearly interpolated between 0, 30, 90,
+                  150 and 180 degrees
+    Any other name is read as a file with one "<angle> <gain>" line per
+    point, angles in degrees from 0 to 180, linearly interpolated.
+"""
+
+import numpy as np
+
+# RSSI global values for antenna
+dir_30 = 4
+dir_90 = 2
+dir_150 = -4
+dir_180 = -3
+
+#
+# gains[i] for angles up to limits[i] (and gains[-1] beyond limits[-1])
+#
+class StepPattern():
+    def __init__(self, limits, gains):
+        self.limits = np.asarray(limits, dtype=float)
+        self.gains = np.asarray(gains, dtype=float)
+
+    def gain(self, angle):
+        i = np.searchsorted(self.limits, angle, side="left")
+        return self.gains[np.minimum(i, len(self.gains) - 1)]
+
+#
+# gains linearly interpolated between the points (angles, gains)
+#
+class TablePattern():
+    def __init__(self, angles, gains):
+        self.angles = np.asarray(angles, dtype=float)
+        self.gains = np.asarray(gains, dtype=float)
+
+    def gain(self, angle):
+        return np.interp(angle, self.angles, self.gains)
+
+patterns = {
+    "step": StepPattern([30, 90, 150, 180], [dir_30, dir_90, dir_150, dir_180]),
+    "interpolated": TablePattern([0, 30, 90, 150, 180],
+                                 [dir_30, dir_30, dir_90, dir_150, dir_180]),
+}
+
+#
+# pattern by name, or from a file of angle gain lines
+#
+def pattern(name):
+    if name in patterns:
+        return patterns[name]
+    table = np.loadtxt(name, ndmin=2)
+    order = np.argsort(table[:, 0], kind="mergesort")
+    return TablePattern(table[order, 0], table[order, 1])
+
+#
+# angle (degrees) at node (x, y) between its own base station (ox, oy) and
+# base station (bx, by), element by element (arrays broadcast)
+#
+def angles(x, y, ox, oy, bx, by):
+    ax = ox - x
+    ay = oy - y
+    cx = bx - x
+    cy = by - y
+    cosine = (ax*cx + ay*cy) / (np.sqrt(ax*ax + ay*ay) * np.sqrt(cx*cx + cy*cy))
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+#
+# gain of every link of the nodes at (x, y), which belong to the base
+# stations with index own, nodes x base stations; the link to the own base
+# station gets the gain at 0 degrees
+#
+def gains(pat, x, y, own, bx, by):
+    a = angles(x[:, None], y[:, None], bx[own][:, None], by[own][:, None],
+               bx[None, :], by[None, :])
+    a[np.arange(len(x)), own] = 0.0
+    return pat.gain(a)
+
+#
+# gain of single links, from node (x, y) with its own base station at
+# (ox, oy) to base station (bx, by); isOwn marks the links to the own one
+#
+def linkGains(pat, x, y, ox, oy, bx, by, isOwn):
+    a = angles(x, y, ox, oy, bx, by)
+    a[isOwn] = 0.0
+    return pat.gain(a)
+
+#
+# largest gain of a pattern
+#
+def maxGain(pat):
+    return float(np.max(pat.gains))
+
+#
+# smallest gain of a pattern
+#
+def minGain(pat):
+    return float(np.min(pat.gains))
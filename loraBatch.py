@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: vectorized batch engine for ALOHA traffic to one base station
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    With ALOHA traffic every node of loraDir.py repeats the same cycle: wait
+    an exponentially distributed time (with slotted ALOHA, also until the
+    next slot starts), transmit for rectime, wait again. Instead of running
+    one SimPy process per node, the batch engine draws the transmissions of
+    all nodes with NumPy, sorts them once and resolves them with array
+    operations:
+
+    - collisions: all pairs (new packet, packet still in the air) with the
+      same spreading factor are enumerated with a sliding window over the
+      start times; frequencyCollision(), timingCollision() and
+      powerCollision() are evaluated on the pair arrays with exactly the same
+      rules (and thresholds) as checkcollision().
+    - maxBSReceives: as long as no more than maxBSReceives packets are in the
+      air, every packet is processed. Only the busy periods in which the
+      demodulator limit can actually be hit are replayed packet by packet.
+
+    The simulated time is cut into windows so memory use is bounded by the
+    number of transmissions per window, not by simtime. Packets still in the
+    air at the end of a window are carried over into the next one.
+
+    Statistics follow transmit(): a packet is counted as sent when it starts
+    before simtime, and counted as collided, received, processed or lost
+    when it ends before simtime.
+"""
+
+import heapq
+import numpy as np
+from loraCollision import powerThreshold
+
+# number of transmissions generated per window
+windowSize = 1000000
+
+# number of (packet, packet) pairs evaluated at once
+pairChunk = 4000000
+
+#
+# results of a batch run, same counters as the SimPy version of loraSim.py
+#
+class BatchResult():
+    def __init__(self, nrNodes):
+        self.sent = np.zeros(nrNodes, dtype=np.int64)
+        self.nrCollisions = 0
+        self.nrReceived = 0
+        self.nrProcessed = 0
+        self.nrLost = 0
+
+#
+# vectorized frequencyCollision(p1, p2), p1 being the new packet
+#
+def frequencyCollision(f1, bw1, f2):
+    df = np.abs(f1 - f2)
+    return (((df <= 120) & ((bw1 == 500) | (f2 == 500))) |
+            ((df <= 60) & ((bw1 == 250) | (f2 == 250))) |
+            (df <= 30))
+
+#
+# vectorized timingCollision(p1, p2), p1 being the new packet
+#
+def timingCollision(start1, sf1, bw1, end2, Npream=8):
+    # assuming Npream (8) preamble symbols
+    Tpreamb = np.power(2.0, sf1)/bw1 * (Npream - 5)
+    return start1 + Tpreamb < end2
+
+#
+# vectorized powerCollision(p1, p2), returns which of the two are casualties
+#
+def powerCollision(rssi1, rssi2, threshold=powerThreshold):
+    diff = rssi1 - rssi2
+    both = np.abs(diff) < threshold
+    # p1 is lost when both are too close, or when p2 overpowered it
+    lost1 = both | (diff < threshold)
+    # p2 is only lost when it was the weaker packet
+    lost2 = both | ~lost1
+    return lost1, lost2
+
+#
+# start of the first slot at or after t, slots start guard_time after every
+# multiple of slot_time
+#
+def align(t, slot_time, guard_time=0):
+    return np.ceil((t - guard_time) / slot_time) * slot_time + guard_time
+
+#
+# draw the start of the next transmission of nodes idle since now, shape of
+# period
+#
+def nextStart(now, period, slot_time, guard_time=0, rng=np.random):
+    A = rng.exponential(period)
+    if slot_time:
+        # same as nextGap() of loraSim.py, wait for the next slot
+        A = align(now + A, slot_time, guard_time) - now
+    return now + A
+
+#
+# SimPy handles events at the same instant in the order they were
+# scheduled. The start of packet i is scheduled when its node finished the
+# previous packet (prev_i), the end of packet j when j started. So j is
+# still in the air when i arrives if it ends later, or if it ends at the
+# very same instant but i was scheduled first.
+#
+def inAir(start_j, end_j, start_i, prev_i):
+    return (end_j > start_i) | ((end_j == start_i) & (prev_i < start_j))
+
+#
+# generate all transmissions of the nodes that start before t_end
+# every node has one pending start (upcoming) that was scheduled at prev,
+# both are updated in place
+#
+def arrivals(prev, upcoming, period, rectime, slot_time, guard_time, t_end, rng=np.random):
+    ids = []
+    starts = []
+    prevs = []
+    cycle = period + rectime
+    active = np.nonzero(upcoming < t_end)[0]
+    while len(active):
+        na = len(active)
+        # expected number of packets per node in the window, with a margin
+        horizon = np.amax((t_end - upcoming[active]) / cycle[active])
+        k = int(min(horizon * 1.1 + 8, windowSize // na + 8))
+        gaps = rng.exponential(np.repeat(period[active, np.newaxis], k-1, axis=1))
+        if slot_time:
+            # a start depends on where the gap ends in the slot grid, so
+            # the nodes are advanced one packet at a time
+            t = np.empty((na, 2*k))
+            t[:, 0] = upcoming[active]
+            r = rectime[active]
+            for c in range(1, k):
+                end = t[:, 2*c-2] + r
+                t[:, 2*c-1] = end
+                t[:, 2*c] = end + (align(end + gaps[:, c-1], slot_time, guard_time) - end)
+            t[:, -1] = t[:, -2] + r
+        else:
+            # accumulate the times in the same order as env.now in transmit():
+            # start, +rectime, +gap, +rectime, ...
+            steps = np.empty((na, 2*k))
+            steps[:, 0] = upcoming[active]
+            steps[:, 1::2] = rectime[active, np.newaxis]
+            steps[:, 2::2] = gaps
+            t = np.cumsum(steps, axis=1)
+        s = t[:, 0::2]
+        p = np.concatenate((prev[active, np.newaxis], t[:, 1:-1:2]), axis=1)
+        keep = s < t_end
+        ids.append(np.broadcast_to(active[:, np.newaxis], s.shape)[keep])
+        starts.append(s[keep])
+        prevs.append(p[keep])
+
+        # the first start at or after t_end stays pending
+        m = keep.sum(axis=1)
+        pending = m < k
+        prev[active[pending]] = p[pending, m[pending]]
+        upcoming[active[pending]] = s[pending, m[pending]]
+        # the others continue after their last packet
+        more = active[~pending]
+        prev[more] = t[~pending, -1]
+        upcoming[more] = nextStart(prev[more], period[more], slot_time, guard_time, rng)
+        active = more[upcoming[more] < t_end]
+    if ids:
+        return np.concatenate(ids), np.concatenate(starts), np.concatenate(prevs)
+    return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+
+#
+# mark collided packets, pairs (i, j) where j is still in the air when i starts
+# (with slot, the slot of every packet, only pairs with j in an earlier slot).
+# The other arguments are for loraTrace.py: only the packets marked in
+# checked are checked when they start (default all), signal_end is when
+# the signal of a packet ends for timingCollision() (default end), and
+# threshold and Npream change powerCollision() and timingCollision()
+#
+def resolveCollisions(start, end, prev, sf, bw, freq, rssi, collided, first, full_collision,
+                      slot=None, checked=None, signal_end=None, threshold=powerThreshold, Npream=8):
+    if signal_end is None:
+        signal_end = end
+    for s in np.unique(sf[first:]):
+        grp = np.nonzero(sf == s)[0]
+        gstart = start[grp]
+        maxair = np.amax(end[grp] - gstart)
+        # earliest packet in the group that may still be in the air
+        lo = np.searchsorted(gstart, gstart - maxair, 'left')
+        if checked is None:
+            new = np.nonzero(grp >= first)[0]
+        else:
+            new = np.nonzero((grp >= first) & checked[grp])[0]
+        if slot is None:
+            cnt = new - lo[new]
+        else:
+            gslot = slot[grp]
+            cnt = np.maximum(np.searchsorted(gslot, gslot[new], 'left') - lo[new], 0)
+        # enumerate the pairs in chunks of roughly pairChunk
+        tot = np.cumsum(cnt)
+        c = 0
+        while c < len(new):
+            base = tot[c-1] if c else 0
+            e = max(int(np.searchsorted(tot, base + pairChunk, 'right')), c + 1)
+            ni = new[c:e]
+            nc = cnt[c:e]
+            c = e
+            npairs = int(nc.sum())
+            if not npairs:
+                continue
+            gi = np.repeat(ni, nc)
+            offs = np.arange(npairs) - np.repeat(np.cumsum(nc) - nc, nc)
+            gj = np.repeat(lo[ni], nc) + offs
+            i = grp[gi]
+            j = grp[gj]
+            hit = inAir(start[j], end[j], start[i], prev[i]) \
+                & frequencyCollision(freq[i], bw[i], freq[j])
+            i = i[hit]
+            j = j[hit]
+            if full_collision:
+                t = timingCollision(start[i], sf[i], bw[i], signal_end[j], Npream)
+                i = i[t]
+                j = j[t]
+                lost1, lost2 = powerCollision(rssi[i], rssi[j], threshold)
+                collided[i[lost1]] = 1
+                collided[j[lost2]] = 1
+            else:
+                collided[i] = 1
+                collided[j] = 1
+
+#
+# decide which packets get a free demodulator path at the base station
+#
+def resolveProcessing(start, end, prev, processed, first, maxBSReceives):
+    n = len(start)
+    # upper bound on the number of packets in the air when a packet arrives
+    inAirCount = np.arange(n) - np.searchsorted(np.sort(end), start, 'left')
+    # busy periods, packets that overlap (transitively) with each other
+    runEnd = np.maximum.accumulate(end)
+    newPeriod = np.ones(n, dtype=bool)
+    newPeriod[1:] = start[1:] > runEnd[:-1]
+    period = np.cumsum(newPeriod) - 1
+    bounds = np.append(np.nonzero(newPeriod)[0], n)
+
+    processed[first:] = 1
+    # only replay the busy periods where the limit might be reached
+    crowded = np.unique(period[first:][inAirCount[first:] > maxBSReceives])
+    for p in crowded:
+        heap = []
+        busy = 0
+        for k in range(bounds[p], bounds[p+1]):
+            # remove the packets that are no longer in the air, see inAir()
+            while heap and (heap[0][0] < start[k] or
+                            (heap[0][0] == start[k] and heap[0][1] >= prev[k])):
+                busy = busy - heapq.heappop(heap)[2]
+            if k >= first:
+                processed[k] = 1 if busy <= maxBSReceives else 0
+            heapq.heappush(heap, (end[k], start[k], processed[k]))
+            busy = busy + processed[k]
+
+#
+# run the whole simulation for the given nodes (as created by loraSim.py)
+# drawing the inter-arrival times from rng
+#
+def run(nodes, simtime, sensi, maxBSReceives, full_collision, slot_time=None, rng=np.random,
+        guard_time=0):
+    nrNodes = len(nodes)
+    res = BatchResult(nrNodes)
+    period = np.array([float(n.period) for n in nodes])
+    rectime = np.array([n.packet.rectime for n in nodes])
+    sf = np.array([n.packet.sf for n in nodes])
+    bw = np.array([n.packet.bw for n in nodes])
+    freq = np.array([n.packet.freq for n in nodes], dtype=np.float64)
+    rssi = np.array([n.packet.rssi for n in nodes])
+
+    # same sensitivity lookup as transmit()
+    bwcol = np.select([bw == 125, bw == 250], [1, 2], 3)
+    lost = rssi < sensi[sf - 7, bwcol]
+
+    # carried over: in the air at the start of the window
+    c_node = np.zeros(0, dtype=np.int64)
+    c_start = np.zeros(0)
+    c_prev = np.zeros(0)
+    c_coll = np.zeros(0, dtype=np.int8)
+    c_proc = np.zeros(0, dtype=np.int8)
+
+    rate = np.sum(1.0 / (period + rectime))
+    window = max(windowSize / rate, np.amax(rectime))
+    prev = np.zeros(nrNodes)
+    pending = nextStart(prev, period, slot_time, guard_time, rng)
+    t0 = 0.0
+    while t0 < simtime:
+        t1 = min(t0 + window, simtime)
+        ids, starts, prevs = arrivals(prev, pending, period, rectime, slot_time, guard_time, t1, rng)
+        res.sent += np.bincount(ids, minlength=nrNodes)
+
+        # lost packets never reach the base station
+        isLost = lost[ids]
+        ends = starts[isLost] + rectime[ids[isLost]]
+        res.nrLost += int(np.count_nonzero(ends < simtime))
+        ids = ids[~isLost]
+        starts = starts[~isLost]
+        prevs = prevs[~isLost]
+
+        # sort on start time, then in the order SimPy scheduled the starts
+        order = np.lexsort((ids, prevs, starts))
+        first = len(c_node)
+        node = np.concatenate((c_node, ids[order]))
+        start = np.concatenate((c_start, starts[order]))
+        prevt = np.concatenate((c_prev, prevs[order]))
+        end = start + rectime[node]
+        collided = np.concatenate((c_coll, np.zeros(len(ids), dtype=np.int8)))
+        processed = np.concatenate((c_proc, np.zeros(len(ids), dtype=np.int8)))
+
+        if len(node) > first:
+            resolveCollisions(start, end, prevt, sf[node], bw[node], freq[node], rssi[node],
+                              collided, first, full_collision)
+            resolveProcessing(start, end, prevt, processed, first, maxBSReceives)
+
+        # packets that end in this window can not be hit any more
+        done = end < t1
+        res.nrCollisions += int(np.count_nonzero(collided[done]))
+        res.nrReceived += int(np.count_nonzero(collided[done] == 0))
+        res.nrProcessed += int(np.count_nonzero(processed[done]))
+
+        carry = ~done
+        c_node = node[carry]
+        c_start = start[carry]
+        c_prev = prevt[carry]
+        c_coll = collided[carry]
+        c_proc = processed[carry]
+        t0 = t1
+    return res
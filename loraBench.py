@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: benchmarks of the simulator
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ SYNOPSIS:
+   ./loraBench.py [--suite quick|full] [--only <regex>] [--engine simpy|heap|batch|slots]
+                  [--packets <n>] [--seed <n>] [--out <file>] [--compare <file>]
+ DESCRIPTION:
+    Runs a suite of benchmark cases, each in a fresh worker process, and
+    writes the results as JSON so runs of different commits can be compared.
+
+    End to end cases run a whole simulation through loraSim.py:
+    dir-n<nodes>-e<experiment>-c<collision>
+        a loraDir.py run (Simulation), experiments 0 to 5, simple and full
+        collision check, 100 to 100000 nodes
+    mulbs-bs<basestations>-c<collision>
+        a loraDirMulBS.py run (MultiBSSimulation) with 1 to 24 base stations
+    mulbs-hex<basestations>-c<collision>
+        the same with 24 to 300 base stations on a hexagonal lattice (links
+        in range only, see loraLayout.py), 100 nodes per base station
+    Each reports the wall time (build and run), the events processed per
+    second of run time, the peak resident set size of the worker and the
+    number of packets compared in the collision checks per packet sent.
+    Every node sends --packets packets on average (simtime is --packets
+    times avgsend), nodes are placed in bulk without a minimum distance and
+    loraDir.py cases use slotted ALOHA, as loraDir.py does by default.
+
+    Micro benchmarks time a single function, as seconds per call (the best
+    of 5 rounds):
+    micro-checkcollision-k<k>
+        Simulation.checkcollision() of a packet against k packets in flight
+        on the same frequency and spreading factor (full collision check)
+    micro-airtime
+        loraAirtime.airtime(), cached, and BestSetting.resolve() per node
+    micro-placement-<grid|bulk>-n<nodes>
+        placing the nodes of a disc one by one or in bulk, both 10 m apart
+        (loraPlacement.minDist); bulk also at the size of the grid case
+    micro-updateRSSI-bs<basestations>
+        DirectionalSimulation.updateRSSI() of the links of 1000 nodes, every
+        round from the same link RSSI
+
+    --suite
+        quick (default) a few small cases in seconds, full all cases.
+        The 100000 node cases of the full suite take hours with simpy.
+    --only
+        only the cases whose name matches this regular expression
+    --engine
+        engine of the end to end loraDir.py cases (default simpy)
+    --packets
+        packets per node of the end to end cases (default 10)
+    --seed
+        seed of all cases (default 1), keep it fixed to compare commits
+    --out
+        JSON file of the results (default benchmark.json)
+    --compare
+        JSON file of an earlier run, prints the ratio of the times of the
+        cases in both runs (above 1: slower now)
+ OUTPUT
+    One line per case on stdout, and the JSON file: the commit, host, Python
+    and NumPy versions and the list of cases, each with its name, kind, its
+    parameters and its measurements.
+ EXAMPLE
+    > python loraBench.py --suite quick --out before.json
+    > python loraBench.py --suite quick --compare before.json
+"""
+
+import os
+import re
+import sys
+import json
+import random
+import time
+import socket
+import timeit
+import argparse
+import platform
+import resource
+import subprocess
+import multiprocessing
+import numpy as np
+import loraAirtime
+import loraPlacement
+from loraSim import Scenario, Simulation, MultiBSSimulation, DirectionalSimulation, sensi
+
+# average sending interval of the end to end cases (ms)
+avgSend = 1000000
+
+# rounds of a micro benchmark, the best one counts
+rounds = 5
+
+#
+# benchmark cases of a suite, as (name, kind, parameters)
+#
+def suite(name, engine, packets, seed):
+    if name == "full":
+        nodes, experiments, basestations = [100, 1000, 10000, 100000], range(0, 6), [1, 2, 3, 4, 6, 8, 24]
+        hexagonal, inFlight, placed = [24, 96, 300], [10, 100, 1000], [200, 100000]
+    else:
+        nodes, experiments, basestations = [100, 1000], [0, 3], [1, 4]
+        hexagonal, inFlight, placed = [24], [10, 100], [200, 10000]
+    cases = []
+    for n in nodes:
+        for e in experiments:
+            for c in [0, 1]:
+                cases.append(("dir-n{}-e{}-c{}".format(n, e, c), "dir",
+                              {"nrNodes": n, "experiment": e, "full_collision": c,
+                               "engine": engine, "packets": packets, "seed": seed}))
+    for b in basestations:
+        for c in [0, 1]:
+            cases.append(("mulbs-bs{}-c{}".format(b, c), "mulbs",
+                          {"nrNodes": 1000, "nrBS": b, "experiment": 0, "full_collision": c,
+                           "packets": packets, "seed": seed}))
+    for b in hexagonal:
+        for c in [0, 1]:
+            cases.append(("mulbs-hex{}-c{}".format(b, c), "mulbs",
+                          {"nrNodes": 100 * b, "nrBS": b, "layout": "hex", "experiment": 0,
+                           "full_collision": c, "packets": packets, "seed": seed}))
+    for k in inFlight:
+        cases.append(("micro-checkcollision-k{}".format(k), "checkcollision", {"k": k, "seed": seed}))
+    cases.append(("micro-airtime", "airtime", {"nrNodes": 10000, "seed": seed}))
+    cases.append(("micro-placement-grid-n{}".format(placed[0]), "placement",
+                  {"nrNodes": placed[0], "bulk": 0, "seed": seed}))
+    for n in placed:
+        cases.append(("micro-placement-bulk-n{}".format(n), "placement",
+                      {"nrNodes": n, "bulk": 1, "seed": seed}))
+    cases.append(("micro-updateRSSI-bs2", "updateRSSI", {"nrNodes": 1000, "nrBS": 2, "seed": seed}))
+    return cases
+
+#
+# peak resident set size of this process in kB
+#
+def peakRSS():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # bytes on macOS
+        rss = rss // 1024
+    return rss
+
+#
+# best time per call of f() over rounds rounds of number calls
+#
+def perCall(f, number):
+    return min(timeit.repeat(f, repeat=rounds, number=number)) / number
+
+def endToEnd(kind, p):
+    sc = Scenario(p["nrNodes"], avgSend, p["experiment"], avgSend * p["packets"],
+                  full_collision=bool(p["full_collision"]), placement="bulk", minDist=0,
+                  seed=p["seed"])
+    if kind == "dir":
+        # as loraDir.py runs it
+        sc.engine = p["engine"]
+        sc.aloha = "slotted"
+        sim = Simulation(sc)
+    else:
+        sc.nrBS = p["nrBS"]
+        sc.layout = p.get("layout", "fixed")
+        sim = MultiBSSimulation(sc)
+    res = sim.run()
+    return {"wallTime": res.buildTime + res.runTime, "buildTime": res.buildTime,
+            "runTime": res.runTime, "events": res.events,
+            "eventsPerSecond": res.events / res.runTime if res.runTime else float("nan"),
+            "sent": res.sent, "comparisons": res.comparisons,
+            "comparisonsPerPacket": res.comparisons / float(res.sent) if res.sent else float("nan"),
+            "der": res.der}
+
+def checkcollision(p):
+    k = p["k"]
+    sc = Scenario(k + 1, avgSend, 0, avgSend, full_collision=True, engine="heap",
+                  placement="bulk", minDist=0, seed=p["seed"])
+    sim = Simulation(sc)
+    sim.build()
+    # with experiment 0 all packets share one frequency and spreading factor
+    for node in sim.nodes[:k]:
+        if not node.packet.lost:
+            sim.startTx(node)
+    packet = sim.nodes[k].packet
+    return {"inFlight": len(sim.activeTx),
+            "perCall": perCall(lambda: sim.checkcollision(packet), max(1, 100000 // k))}
+
+def airtime(p):
+    best = loraAirtime.BestSetting(sensi, 1, 20)
+    prx = np.random.RandomState(p["seed"]).uniform(-140, -100, p["nrNodes"])
+    return {"perCall": perCall(lambda: loraAirtime.airtime(12, 4, 20, 125), 100000),
+            "resolvePerNode": perCall(lambda: best.resolve(prx), 10) / p["nrNodes"]}
+
+def placement(p):
+    n = p["nrNodes"]
+    radius = 3000.0
+    if p["bulk"]:
+        rng = np.random.RandomState(p["seed"])
+        f = lambda: loraPlacement.bulkPlaceDisc(n, radius, radius, radius,
+                                                loraPlacement.minDist, rng=rng)
+    else:
+        rng = random.Random(p["seed"])
+        def f():
+            grid = loraPlacement.NodeGrid(loraPlacement.minDist)
+            for i in range(0, n):
+                loraPlacement.placeInDisc(grid, radius, radius, radius, rng=rng)
+    t = perCall(f, 1)
+    return {"perCall": t, "perNode": t / n}
+
+def updateRSSI(p):
+    sc = Scenario(p["nrNodes"], avgSend, 0, avgSend, nrBS=p["nrBS"], directionality=1,
+                  nrNetworks=p["nrBS"], baseDist=1000.0, seed=p["seed"])
+    sim = DirectionalSimulation(sc)
+    sim.build()
+    # updateRSSI() adds the gains to the link RSSI, restore it every round
+    rssi = sim.linkRSSI.copy()
+    def restore():
+        sim.linkRSSI = rssi.copy()
+    return {"perCall": min(timeit.repeat(sim.updateRSSI, setup=restore, repeat=rounds * 20,
+                                         number=1))}
+
+micro = {"checkcollision": checkcollision, "airtime": airtime,
+         "placement": placement, "updateRSSI": updateRSSI}
+
+#
+# run one case in this (fresh) worker process
+#
+def runCase(case):
+    name, kind, params = case
+    start = time.time()
+    if kind in micro:
+        res = micro[kind](params)
+    else:
+        res = endToEnd(kind, params)
+    res["peakRSS"] = peakRSS()
+    res["seconds"] = time.time() - start
+    return {"name": name, "kind": kind, "params": params, "results": res}
+
+#
+# commit of the working tree, None outside a git checkout
+#
+def commit():
+    try:
+        out = subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.STDOUT,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode("ascii").strip()
+
+#
+# the measurement compared between runs: the wall time or the time per call
+#
+def timeOf(case):
+    r = case["results"]
+    return r.get("wallTime", r.get("perCall"))
+
+def summary(case):
+    r = case["results"]
+    if "wallTime" in r:
+        return "{:8.3f} s {:10.0f} events/s {:8.1f} comparisons/packet {:8d} kB".format(
+            r["wallTime"], r["eventsPerSecond"], r["comparisonsPerPacket"], r["peakRSS"])
+    return "{:12.3f} us/call".format(r["perCall"] * 1e6)
+
+def main():
+    parser = argparse.ArgumentParser(usage="./loraBench.py [options]")
+    parser.add_argument("--suite", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only")
+    parser.add_argument("--engine", choices=["simpy", "heap", "batch", "slots"], default="simpy")
+    parser.add_argument("--packets", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    cases = suite(args.suite, args.engine, args.packets, args.seed)
+    if args.only:
+        cases = [c for c in cases if re.search(args.only, c[0])]
+    before = {}
+    if args.compare:
+        with open(args.compare) as f:
+            before = dict((c["name"], c) for c in json.load(f)["cases"])
+
+    run = {"commit": commit(), "host": socket.gethostname(), "time": time.time(),
+           "python": platform.python_version(), "numpy": np.__version__,
+           "suite": args.suite, "cases": []}
+    # a new worker per case, so the peak RSS is the one of the case
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        for case in pool.imap(runCase, cases):
+            line = "{:32} {}".format(case["name"], summary(case))
+            if case["name"] in before:
+                line = line + "  x{:.3f}".format(timeOf(case) / timeOf(before[case["name"]]))
+            print (line)
+            sys.stdout.flush()
+            run["cases"].append(case)
+    finally:
+        pool.close()
+        pool.join()
+    with open(args.out, "w") as f:
+        json.dump(run, f, indent=1, sort_keys=True)
+    print (args.out)
+
+if __name__ == "__main__":
+    main()
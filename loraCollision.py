@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: index of the transmissions in flight at the base stations
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    checkcollision() only reports a collision when both frequencyCollision()
+    and sfCollision() hold. sfCollision() requires identical spreading
+    factors and frequencyCollision() never accepts two frequencies that are
+    more than 120 Hz apart (the widest window, used for BW500). Packets in
+    flight are therefore kept in buckets keyed by
+
+        (base station, spreading factor, frequency // 120)
+
+    and a new arrival only has to be compared with the packets in its own
+    bucket and the two neighbouring frequency buckets. All other packets can
+    never pass the simple collision check, so the result of checkcollision()
+    is identical to a linear scan over all packets at the base station.
+
+    Marking a packet as collided is idempotent, so the order in which the
+    candidates are visited does not change the outcome. Within a bucket the
+    packets are kept in order of arrival.
+
+    The index also counts the transmissions in the air per base station,
+    and the most at the same time (peak): the peak length of packetsAtBS of
+    the original scripts, the lost interferers of MultiBSSimulation
+    included.
+"""
+
+# widest frequency window in frequencyCollision()
+maxFreqDiff = 120
+
+# a packet survives the capture of a packet this much weaker (dB)
+powerThreshold = 6
+
+#
+# index of active transmissions, one per simulation
+#
+class CollisionIndex():
+    def __init__(self, width=maxFreqDiff):
+        # width of a frequency bucket, must be >= the widest window
+        self.width = width
+        self.buckets = {}
+        self.size = 0
+        # transmissions in the air per base station, and the most at once
+        self.perBS = {}
+        self.peak = {}
+
+    def key(self, bs, packet):
+        return (bs, packet.sf, int(packet.freq // self.width))
+
+    # add a transmission (node) with the given packet to base station bs
+    def add(self, bs, packet, item):
+        k = self.key(bs, packet)
+        bucket = self.buckets.get(k)
+        if bucket is None:
+            self.buckets[k] = [item]
+        else:
+            bucket.append(item)
+        self.size = self.size + 1
+        n = self.perBS.get(bs, 0) + 1
+        self.perBS[bs] = n
+        if n > self.peak.get(bs, 0):
+            self.peak[bs] = n
+
+    # remove a transmission, packet must still have the sf/freq used in add()
+    def remove(self, bs, packet, item):
+        k = self.key(bs, packet)
+        bucket = self.buckets[k]
+        bucket.remove(item)
+        if not bucket:
+            del self.buckets[k]
+        self.size = self.size - 1
+        self.perBS[bs] = self.perBS[bs] - 1
+
+    # all transmissions at base station bs that may collide with packet
+    def candidates(self, bs, packet):
+        bs_, sf, fb = self.key(bs, packet)
+        cand = []
+        for b in (fb - 1, fb, fb + 1):
+            bucket = self.buckets.get((bs_, sf, b))
+            if bucket:
+                cand.extend(bucket)
+        return cand
+
+    def __len__(self):
+        return self.size
+
+#
+# frequencyCollision, conditions
+#
+#        |f1-f2| <= 120 kHz if f1 or f2 has bw 500
+#        |f1-f2| <= 60 kHz if f1 or f2 has bw 250
+#        |f1-f2| <= 30 kHz if f1 or f2 has bw 125
+def frequencyCollision(p1,p2):
+    if (abs(p1.freq-p2.freq)<=120 and (p1.bw==500 or p2.freq==500)):
+        return True
+    elif (abs(p1.freq-p2.freq)<=60 and (p1.bw==250 or p2.freq==250)):
+        return True
+    else:
+        if (abs(p1.freq-p2.freq)<=30):
+            return True
+    return False
+
+def sfCollision(p1, p2):
+    if p1.sf == p2.sf:
+        # p2 may have been lost too, will be marked by other checks
+        return True
+    return False
+
+def powerCollision(p1, p2):
+    if abs(p1.rssi - p2.rssi) < powerThreshold:
+        # packets are too close to each other, both collide
+        # return both packets as casualties
+        return (p1, p2)
+    elif p1.rssi - p2.rssi < powerThreshold:
+        # p2 overpowered p1, return p1 as casualty
+        return (p1,)
+    # p2 was the weaker packet, return it as a casualty
+    return (p2,)
+
+def timingCollision(p1, p2, now):
+    # assuming p1 is the freshly arrived packet (at time now) and this is the
+    # last check we've already determined that p1 is a weak packet, so the only
+    # way we can win is by being late enough (only the first n - 5 preamble symbols overlap)
+
+    # assuming 8 preamble symbols
+    Npream = 8
+
+    # we can lose at most (Npream - 5) * Tsym of our preamble
+    Tpreamb = 2**p1.sf/(1.0*p1.bw) * (Npream - 5)
+
+    # check whether p2 ends in p1's critical section
+    p2_end = p2.addTime + p2.rectime
+    p1_cs = now + Tpreamb
+    if p1_cs < p2_end:
+        # p1 collided with p2 and lost
+        return True
+    return False
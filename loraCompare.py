@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: compare experiments of loraDir.py on one topology and traffic
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ SYNOPSIS:
+   ./loraCompare.py <nodes> <avgsend> <simtime> [--experiments <list>]
+                    [--collisions <list>] [--reps <n>] [--seed <n>] [--out <file>]
+                    [loraDir.py options]
+ DESCRIPTION:
+    Simulates every combination of the given experiments and collision
+    checks on the same nodes and the same traffic, in one process, and
+    reports them side by side.
+
+    Per replication the nodes are placed once, for the first experiment of
+    the list (the reference), and every combination is built on those
+    positions (Simulation.build(topology)). All runs of a replication have
+    the same seed, so every node draws the same gaps between its
+    transmissions and the same random settings (see loraRandom.py): the
+    combinations are compared on common random numbers, and their
+    differences vary much less between replications than the metrics
+    themselves. The start times themselves still differ between
+    experiments, as a gap counts from the end of the previous transmission
+    and the airtime depends on the settings.
+
+    Nodes are placed within maxDist of the reference experiment. Experiments
+    with a smaller range (e.g. 2) lose the packets of the nodes beyond it;
+    put the experiment with the largest range first to compare all of them
+    on nodes they all reach.
+
+    nodes, avgsend, simtime
+        as for loraDir.py
+    --experiments
+        comma separated experiments (default 0,1,2,3,4,5), the first is the
+        reference
+    --collisions
+        comma separated collision checks, 0 simple, 1 full (default 0,1)
+    --reps
+        number of replications (default 1)
+    --seed
+        root seed (default 12345), replication r runs with the seed derived
+        from it and r, as in loraRunner.py
+    --out
+        also append the comparison table to this file
+    Any other option (--engine, --aloha, --placement, --mindist, ...) is
+    parsed as by loraDir.py. Graphics and profiling are off. Every run is
+    recorded in the results store, with its replication number, the root
+    seed and the reference experiment (sharedTopology).
+ OUTPUT
+    One line per combination with the mean (and with more replications the
+    95% confidence interval) of collisions, transmissions, energy and DER,
+    each followed by the mean difference to the first combination and its
+    confidence interval over the paired replications.
+ EXAMPLE
+    > python loraCompare.py 200 1000000 500000000 --experiments 3,0,4,5 --reps 10
+"""
+
+import argparse
+import itertools
+import loraDir
+import loraResults
+import loraRandom
+from loraRunner import metrics, meanCI, intList
+from loraSim import Simulation, SimulationError
+
+#
+# the metrics of all combinations of one replication, None for a failed run
+#
+def replicate(configs, nodes, avgsend, simtime, extra, rep, rootSeed):
+    seed = loraRandom.replicationSeed(rootSeed, rep)
+    reference = None
+    out = []
+    for experiment, collision in configs:
+        argv = [str(v) for v in [nodes, avgsend, experiment, simtime, collision]] + extra
+        sc, args = loraDir.parseArgs(argv, seed=seed)
+        sim = Simulation(sc)
+        try:
+            sim.build(topology=reference)
+            if reference is None:
+                reference = sim
+            r = sim.run()
+        except SimulationError as e:
+            print ("experiment {} collision {} replication {} (seed {}): {}".format(
+                experiment, collision, rep, seed, e))
+            if reference is None:
+                # no topology to share
+                return [None] * len(configs)
+            out.append(None)
+            continue
+        loraResults.record("loraCompare.py", argv, sim, r, args.results, rep=rep,
+                           rootSeed=rootSeed, sharedTopology=configs[0][0])
+        out.append({"collisions": r.nrCollisions, "sent": r.sent, "received": r.nrReceived,
+                    "processed": r.nrProcessed, "lost": r.nrLost, "energy": r.energy,
+                    "der": r.der, "der2": r.der2})
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="./loraCompare.py <nodes> <avgsend> <simtime> [options]")
+    parser.add_argument("nodes", type=int)
+    parser.add_argument("avgsend", type=int)
+    parser.add_argument("simtime", type=int)
+    parser.add_argument("--experiments", type=intList, default=[0, 1, 2, 3, 4, 5])
+    parser.add_argument("--collisions", type=intList, default=[0, 1])
+    parser.add_argument("--reps", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--out")
+    args, extra = parser.parse_known_args()
+
+    configs = list(itertools.product(args.experiments, args.collisions))
+    # fail here, not halfway, on options loraDir.py does not know
+    sc, dirArgs = loraDir.parseArgs([str(v) for v in [args.nodes, args.avgsend, configs[0][0],
+                                                      args.simtime, configs[0][1]]] + extra)
+    print ("combinations: {} replications: {} reference experiment: {}".format(
+        len(configs), args.reps, configs[0][0]))
+
+    # results[c][rep], None for a failed run
+    results = [[] for c in configs]
+    for rep in range(0, args.reps):
+        for c, res in enumerate(replicate(configs, args.nodes, args.avgsend, args.simtime,
+                                          extra, rep, args.seed)):
+            results[c].append(res)
+    try:
+        loraResults.merge(dirArgs.results)
+    except OSError:
+        # another run is merging the store, our shards stay until the next merge
+        pass
+
+    header = "#experiment collision reps " + \
+        " ".join("{0} {0}CI d{0} d{0}CI".format(m) for m in metrics)
+    lines = [header]
+    for c, (experiment, collision) in enumerate(configs):
+        done = [r for r in results[c] if r is not None]
+        row = [str(experiment), str(collision), str(len(done))]
+        # pairs of replications where both this and the reference ran
+        pairs = [(r, ref) for r, ref in zip(results[c], results[0])
+                 if r is not None and ref is not None]
+        for m in metrics:
+            mean, ci = meanCI([r[m] for r in done])
+            dmean, dci = meanCI([r[m] - ref[m] for r, ref in pairs])
+            row.append("{:.6g} {:.6g} {:.6g} {:.6g}".format(mean, ci, dmean, dci))
+        lines.append(" ".join(row))
+    print ("\n".join(lines))
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write("\n".join(lines) + "\n")
+    if any(r is None for rc in results for r in rc):
+        exit(-1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: event kernel with a single heap of transmissions
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    With SimPy every node is a process that yields two timeouts per packet,
+    so every packet costs two event objects and four generator switches.
+    All a node does is alternate between waiting for its next transmission
+    and waiting for the end of the current one, so the same run can be
+    driven by a single binary heap of
+
+        (time, sequence number, node index, START or END)
+
+    tuples. The sequence number orders events at the same time in the order
+    they were scheduled, as SimPy does, and the random numbers are drawn at
+    the same moments (the next gap when a transmission ends), so a run gives
+    identical results under the same seed with either kernel. As with
+    env.run(until=simtime), events at simtime or later are not processed
+    and now is simtime at the end.
+"""
+
+import heapq
+
+# kinds of events
+START = 0
+END = 1
+
+class EventHeap():
+    def __init__(self):
+        self.now = 0
+
+    #
+    # run the nodes of sim (nextGap, startTx and endTx) until until
+    #
+    def run(self, sim, nodes, until):
+        push = heapq.heappush
+        pop = heapq.heappop
+        heap = []
+        seq = 0
+        for i, node in enumerate(nodes):
+            heap.append((self.now + sim.nextGap(node), seq, i, START))
+            seq = seq + 1
+        heapq.heapify(heap)
+        while heap and heap[0][0] < until:
+            t, s, i, kind = pop(heap)
+            self.now = t
+            if kind == START:
+                push(heap, (t + sim.startTx(nodes[i]), seq, i, END))
+            else:
+                node = nodes[i]
+                sim.endTx(node)
+                push(heap, (t + sim.nextGap(node), seq, i, START))
+            seq = seq + 1
+        self.now = until
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: receiver model of a base station (gateway)
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    A gateway demodulates a limited number of packets at the same time
+    (maxBSReceives, 8 for the SX1301). It keeps the transmissions in flight
+    in a dict keyed by node and a count of the demodulator paths in use, so
+    an arrival and the end of a reception take constant time whatever the
+    number of packets in the air.
+
+    As in the original loraDir.py a packet gets a path as long as no more
+    than maxBSReceives paths are busy when it arrives (the batch engine,
+    loraBatch.py, counts the same way). A packet that arrives with detect
+    False is in flight but never takes a path.
+
+    The gateway also records how long k paths were busy, for k = 0 up to
+    the maximum, so the number of paths a deployment needs can be read from
+    occupancy() after a run, and the largest number of transmissions that
+    were in flight at the same time (peak).
+
+    The simulations only hand a gateway the packets that reach it: packets
+    below the sensitivity are never in flight, also not the lost packets
+    that still interfere with more base stations (node.interferers of
+    MultiBSSimulation). So peak counts the packets that reach the base
+    station (Results.peakReceiving); the peak length of packetsAtBS of the
+    original loraDirMulBS.py, with the interfering lost packets, is taken
+    from the CollisionIndex (Results.peakInFlight, see loraCollision.py).
+"""
+
+class Gateway():
+    def __init__(self, id, maxReceives):
+        self.id = id
+        self.maxReceives = maxReceives
+        # transmissions in flight: node -> packet
+        self.inFlight = {}
+        # demodulator paths in use
+        self.busy = 0
+        # time spent with k paths busy, and the time of the last change
+        self.busyTime = [0.0] * (maxReceives + 2)
+        self.last = 0.0
+        # most transmissions in flight at the same time (lost interferers
+        # are not in flight, see above)
+        self.peak = 0
+
+    def __contains__(self, node):
+        return node in self.inFlight
+
+    def __len__(self):
+        return len(self.inFlight)
+
+    # add the time since the last change to the current occupancy
+    def account(self, now):
+        self.busyTime[self.busy] += now - self.last
+        self.last = now
+
+    #
+    # packet of node arrives at now, it gets a demodulator path (processed)
+    # if it can be detected and a path is free
+    #
+    def arrive(self, node, packet, now, detect=True):
+        if detect and self.busy <= self.maxReceives:
+            packet.processed = 1
+            self.account(now)
+            self.busy = self.busy + 1
+        else:
+            packet.processed = 0
+        self.inFlight[node] = packet
+        if len(self.inFlight) > self.peak:
+            self.peak = len(self.inFlight)
+
+    # the transmission of node ends at now, frees its path
+    def leave(self, node, now):
+        packet = self.inFlight.pop(node)
+        if packet.processed == 1:
+            self.account(now)
+            self.busy = self.busy - 1
+        return packet
+
+    #
+    # fraction of the time until now with k paths busy, index k
+    #
+    def occupancy(self, now):
+        self.account(now)
+        if now <= 0:
+            return [0.0] * len(self.busyTime)
+        return [t / float(now) for t in self.busyTime]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: layouts of many base stations
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Positions of any number of base stations, by name (the layout scenario
+    option):
+    fixed  the hand made layouts of loraSim.py for the numbers of base
+           stations the scripts have always used (1, 2, 3, 4, 6, 8, 24)
+    hex    a hexagonal lattice, spacing apart, rows offset by half the
+           spacing, about as wide as high
+    grid   a square grid, spacing apart, about as wide as high
+    Any other name is read as a file with one "<x> <y>" line per base
+    station (in m), of which the first nrBS are used.
+
+    The default spacing lets the discs of radius maxDist around the base
+    stations cover the plane: sqrt(3) maxDist for the hexagonal lattice
+    (and a file) and sqrt(2) maxDist for the grid.
+
+    With hundreds of base stations a node only reaches a few of them. A
+    GatewayIndex puts the base stations in square cells of the search
+    distance, like the NodeGrid of loraPlacement.py, so a node finds the
+    base stations within that distance in the 3 x 3 cells around it.
+
+    On the command line of the scripts a layout is given as
+    <layout>:<nrBS>, e.g. hex:300, a file name, or just the number of base
+    stations for the fixed layout (see parse()).
+"""
+
+import math
+import numpy as np
+
+layouts = ["fixed", "hex", "grid"]
+
+#
+# distance between neighbouring base stations that covers the plane
+# with discs of radius maxDist
+#
+def spacing(layout, maxDist):
+    if layout == "grid":
+        return math.sqrt(2) * maxDist
+    return math.sqrt(3) * maxDist
+
+#
+# n positions on a hexagonal lattice, from (0, 0)
+#
+def hexagonal(n, spacing):
+    # the rows are sqrt(3)/2 spacing apart
+    cols = max(1, int(round(math.sqrt(n * math.sqrt(3) / 2))))
+    i = np.arange(n)
+    row = i // cols
+    x = (i % cols + 0.5 * (row % 2)) * spacing
+    y = row * spacing * math.sqrt(3) / 2
+    return x, y
+
+#
+# n positions on a square grid, from (0, 0)
+#
+def grid(n, spacing):
+    cols = max(1, int(math.ceil(math.sqrt(n))))
+    i = np.arange(n)
+    return (i % cols) * float(spacing), (i // cols) * float(spacing)
+
+#
+# positions of a file of "x y" lines
+#
+def load(fname):
+    table = np.loadtxt(fname, ndmin=2)
+    return table[:, 0], table[:, 1]
+
+#
+# the first n positions of layout (not fixed)
+#
+def positions(layout, n, spacing):
+    if layout == "hex":
+        return hexagonal(n, spacing)
+    if layout == "grid":
+        return grid(n, spacing)
+    x, y = load(layout)
+    if len(x) < n:
+        raise ValueError("{} has {} base stations, not {}".format(layout, len(x), n))
+    return x[:n], y[:n]
+
+#
+# layout and number of base stations of a command line argument:
+# "<n>" (fixed), "hex:<n>", "grid:<n>" or a file (all its base stations)
+#
+def parse(arg):
+    name, sep, n = arg.partition(":")
+    if name in layouts and sep:
+        return name, int(n)
+    if arg.isdigit():
+        return "fixed", int(arg)
+    return arg, len(load(arg)[0])
+
+#
+# base stations at (x, y) in cells of size cell
+#
+class GatewayIndex():
+    def __init__(self, x, y, cell):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.cell = float(cell)
+        cells = {}
+        for i in range(0, len(self.x)):
+            cells.setdefault(self.key(self.x[i], self.y[i]), []).append(i)
+        self.cells = dict((k, np.array(v)) for k, v in cells.items())
+
+    def key(self, x, y):
+        return (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+
+    # ids of the base stations at most dist (<= cell size) from (x, y), in order
+    def near(self, x, y, dist=None):
+        if dist is None:
+            dist = self.cell
+        cx, cy = self.key(x, y)
+        found = [self.cells[(i, j)] for i in (cx - 1, cx, cx + 1) for j in (cy - 1, cy, cy + 1)
+                 if (i, j) in self.cells]
+        if not found:
+            return np.zeros(0, dtype=int)
+        ids = np.sort(np.concatenate(found))
+        dx = self.x[ids] - x
+        dy = self.y[ids] - y
+        return ids[dx*dx + dy*dy <= dist*dist]
+
+    # id of the base station closest to (x, y)
+    def nearest(self, x, y):
+        dx = self.x - x
+        dy = self.y - y
+        return int(np.argmin(dx*dx + dy*dy))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: diagnostic messages of the simulator
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    All diagnostic messages go to the "lorasim" logger of the logging
+    module, never to stdout, and are only formatted when a handler writes
+    them. Which messages a simulation sends is set by its verbose option:
+
+        0   silent, nothing is sent (default)
+        1   info: the set up of the nodes, links and base stations
+        2   error: only errors
+        3   debug: everything, including every transmission and every
+            collision comparison
+
+    A simulation turns the level into flags (info, debug, error) once when
+    it is built, so with verbose 0 a message in the event loop costs a
+    single test of a local variable. toFile() writes the messages to a
+    file, e.g. lorasim.log next to the results of a run.
+"""
+
+import logging
+
+log = logging.getLogger("lorasim")
+log.addHandler(logging.NullHandler())
+log.setLevel(logging.DEBUG)
+log.propagate = False
+
+# default file of the messages
+logFile = "lorasim.log"
+
+# logging level of the verbose option, silent is above every level
+levels = [logging.CRITICAL + 10, logging.INFO, logging.ERROR, logging.DEBUG]
+
+def level(verbose):
+    return levels[max(0, min(verbose, len(levels) - 1))]
+
+#
+# write the messages of the verbose level to fname, returns the handler
+#
+def toFile(verbose, fname=logFile):
+    handler = logging.FileHandler(fname, "w")
+    handler.setLevel(level(verbose))
+    handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    log.addHandler(handler)
+    return handler
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: counters of the outcome of the transmissions of a run
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Every packet that ends at a base station is counted once as lost (below
+    the sensitivity), collided or received, in total, per base station and
+    per spreading factor of the packet. A transmission received by at least
+    one base station is also counted in total and for its node, and apart
+    for its node when one of them belongs to the network of the node.
+
+    Like a network server, the receptions of a transmission at several base
+    stations are merged into one: every transmission that ends is counted
+    by the number of base stations that received it (its gateway
+    diversity, 0 if none did), and at the base station that received it
+    with the strongest signal. All links of a transmission end at the same
+    time (endTx() of loraSim.py), so they are merged as they are counted,
+    without keeping any state per sequence number. All counters have a
+    fixed size, so a run takes the same memory whatever its simtime.
+
+    With trace the sequence numbers of the packets are kept as well, in the
+    lists the scripts used to build (recPackets, collidedPackets,
+    lostPackets and packetsRecBS per base station). They grow with every
+    transmission, only use them for short runs.
+"""
+
+import numpy as np
+
+# spreading factors a packet can have
+minSF = 6
+maxSF = 12
+
+class Metrics():
+    def __init__(self, nrBS, nrNodes, trace=False):
+        # transmissions received by at least one base station
+        self.received = 0
+        # packets (per base station) that collided, were below the
+        # sensitivity or got a demodulator path
+        self.collided = 0
+        self.lost = 0
+        self.processed = 0
+        self.receivedPerBS = [0] * nrBS
+        self.collidedPerBS = [0] * nrBS
+        self.lostPerBS = [0] * nrBS
+        nrSF = maxSF - minSF + 1
+        self.receivedPerSF = [0] * nrSF
+        self.collidedPerSF = [0] * nrSF
+        self.lostPerSF = [0] * nrSF
+        # transmissions of each node received by at least one base station,
+        # and by at least one base station of its own network
+        self.receivedPerNode = np.zeros(nrNodes, dtype=np.int64)
+        self.deliveredPerNode = np.zeros(nrNodes, dtype=np.int64)
+        # transmissions by the number of base stations that received them,
+        # and per base station those it received with the strongest signal
+        self.diversity = [0] * (nrBS + 1)
+        self.bestPerBS = [0] * nrBS
+
+        self.trace = trace
+        if trace:
+            self.recPackets = []
+            self.collidedPackets = []
+            self.lostPackets = []
+            self.packetsRecBS = [[] for i in range(0, nrBS)]
+
+    def lostPacket(self, packet):
+        self.lost = self.lost + 1
+        self.lostPerBS[packet.bs] += 1
+        self.lostPerSF[packet.sf - minSF] += 1
+        if self.trace:
+            self.lostPackets.append(packet.seqNr)
+
+    def collidedPacket(self, packet):
+        self.collided = self.collided + 1
+        self.collidedPerBS[packet.bs] += 1
+        self.collidedPerSF[packet.sf - minSF] += 1
+        if self.trace:
+            self.collidedPackets.append(packet.seqNr)
+
+    # packet received at its base station, delivered if it counts for it
+    def receivedPacket(self, packet, delivered=True):
+        self.receivedPerSF[packet.sf - minSF] += 1
+        if delivered:
+            self.receivedPerBS[packet.bs] += 1
+            if self.trace:
+                self.packetsRecBS[packet.bs].append(packet.seqNr)
+
+    # links below the sensitivity to base stations bs with spreading factors
+    # sf, of n transmissions each (arrays with one element per link)
+    def lostLinks(self, bs, sf, n):
+        self.lost = self.lost + int(np.sum(n))
+        perBS = np.bincount(bs, weights=n, minlength=len(self.lostPerBS))
+        for i in np.nonzero(perBS)[0]:
+            self.lostPerBS[i] += int(perBS[i])
+        perSF = np.bincount(sf - minSF, weights=n, minlength=len(self.lostPerSF))
+        for i in np.nonzero(perSF)[0]:
+            self.lostPerSF[i] += int(perSF[i])
+
+    # transmission seqNr of node ended, received by gateways base stations,
+    # best the one with the strongest signal (None if there is none)
+    def endedTransmission(self, node, seqNr, gateways, best):
+        self.diversity[gateways] += 1
+        if gateways == 0:
+            return
+        self.received = self.received + 1
+        self.receivedPerNode[node.nodeid] += 1
+        self.bestPerBS[best] += 1
+        if self.trace:
+            self.recPackets.append(seqNr)
+
+    # a transmission of node was received by a base station of its network
+    def deliveredTransmission(self, node):
+        self.deliveredPerNode[node.nodeid] += 1
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: node placement with a minimum distance between nodes
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Nodes are kept in a uniform grid (spatial hash) with cells of minDist x
+    minDist metres. Two nodes closer than minDist are always in the same or
+    in neighbouring cells, so a candidate position only has to be compared
+    with the nodes in the 3 x 3 cells around it instead of with every node
+    placed so far. A candidate is accepted when it is at least minDist away
+    from *all* other nodes.
+
+    placeInDisc() and placeInRect() place one node at a time, drawing from
+    Python's random module like the scripts did before. bulkPlaceDisc()
+    places all nodes of a disc at once: it draws candidates in NumPy arrays
+    and rejects, per round, the candidates that are too close to an accepted
+    node or to an earlier candidate of the same round.
+
+    All functions draw from the given random generator (a random.Random or a
+    numpy.random.RandomState), by default from the global ones.
+
+    Positions inside a disc are drawn as in the original scripts: with a and
+    b uniform in [0, 1] and a <= b, the node is put at radius b*maxDist and
+    angle 2*pi*a/b, which gives a uniform density over the disc.
+"""
+
+import math
+import random
+import numpy as np
+
+# minimum distance between two nodes in metres
+minDist = 10
+
+# number of candidate positions tried before giving up
+maxRounds = 100
+
+#
+# uniform grid of the nodes placed so far
+#
+class NodeGrid():
+    def __init__(self, cell=minDist):
+        self.cell = float(cell)
+        self.cells = {}
+
+    def key(self, x, y):
+        return (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+
+    def add(self, x, y):
+        k = self.key(x, y)
+        if k in self.cells:
+            self.cells[k].append((x, y))
+        else:
+            self.cells[k] = [(x, y)]
+
+    # is (x, y) at least dist (<= cell size) away from all nodes
+    def isFree(self, x, y, dist=None):
+        if dist is None:
+            dist = self.cell
+        if dist <= 0:
+            return True
+        cx, cy = self.key(x, y)
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for (nx, ny) in self.cells.get((i, j), ()):
+                    if (nx - x)*(nx - x) + (ny - y)*(ny - y) < dist*dist:
+                        return False
+        return True
+
+#
+# random position in a disc of radius maxDist around (cx, cy)
+#
+def discPoint(cx, cy, maxDist, rng=random):
+    a = rng.random()
+    b = rng.random()
+    if b<a:
+        a,b = b,a
+    posx = b*maxDist*math.cos(2*math.pi*a/b)+cx
+    posy = b*maxDist*math.sin(2*math.pi*a/b)+cy
+    return posx, posy
+
+#
+# random position on the integer grid [0, maxX] x [0, maxY]
+#
+def rectPoint(maxX, maxY, rng=random):
+    return rng.randint(0,int(maxX)), rng.randint(0,int(maxY))
+
+#
+# place a node at a free position drawn by draw(), returns None if no free
+# position was found in maxRounds attempts
+#
+def place(grid, draw, dist=minDist, rounds=maxRounds):
+    for r in range(0, rounds):
+        posx, posy = draw()
+        if grid.isFree(posx, posy, dist):
+            grid.add(posx, posy)
+            return posx, posy
+    return None
+
+def placeInDisc(grid, cx, cy, maxDist, dist=minDist, rounds=maxRounds, rng=random):
+    return place(grid, lambda: discPoint(cx, cy, maxDist, rng), dist, rounds)
+
+def placeInRect(grid, maxX, maxY, dist=minDist, rounds=maxRounds, rng=random):
+    return place(grid, lambda: rectPoint(maxX, maxY, rng), dist, rounds)
+
+#
+# vectorized version of discPoint(), n positions at once
+#
+def discPoints(n, cx, cy, maxDist, rng=np.random):
+    a = rng.random_sample(n)
+    b = rng.random_sample(n)
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    # b == 0 only when a == b == 0, the centre of the disc
+    b = np.where(b > 0, b, 1.0)
+    posx = b*maxDist*np.cos(2*np.pi*a/b)+cx
+    posy = b*maxDist*np.sin(2*np.pi*a/b)+cy
+    return posx, posy
+
+#
+# all pairs (i, j) with point i of (ax, ay) closer than dist to point j of
+# (bx, by), found through the cells of a dist x dist grid
+#
+def closePairs(ax, ay, bx, by, dist):
+    if len(ax) == 0 or len(bx) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    acx = np.floor(ax / dist).astype(np.int64)
+    acy = np.floor(ay / dist).astype(np.int64)
+    bcx = np.floor(bx / dist).astype(np.int64)
+    bcy = np.floor(by / dist).astype(np.int64)
+    # one integer key per cell, with room for the neighbouring cells
+    ox = min(acx.min(), bcx.min()) - 1
+    oy = min(acy.min(), bcy.min()) - 1
+    width = max(acy.max(), bcy.max()) - oy + 2
+    bkey = (bcx - ox) * width + (bcy - oy)
+    order = np.argsort(bkey, kind='mergesort')
+    bkey = bkey[order]
+    ia = []
+    ib = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            akey = (acx + dx - ox) * width + (acy + dy - oy)
+            lo = np.searchsorted(bkey, akey, 'left')
+            cnt = np.searchsorted(bkey, akey, 'right') - lo
+            total = int(cnt.sum())
+            if not total:
+                continue
+            i = np.repeat(np.arange(len(ax)), cnt)
+            j = order[np.repeat(lo, cnt) + np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)]
+            close = (ax[i] - bx[j])**2 + (ay[i] - by[j])**2 < dist*dist
+            ia.append(i[close])
+            ib.append(j[close])
+    if not ia:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(ia), np.concatenate(ib)
+
+#
+# place n nodes at once in a disc of radius maxDist around (cx, cy), all at
+# least dist apart (and from the positions in (px, py), if given)
+# returns the x and y arrays, or None when a round of rounds candidates per
+# missing node could not place a single one (the disc is too crowded)
+#
+def bulkPlaceDisc(n, cx, cy, maxDist, dist=minDist, rounds=maxRounds, px=None, py=None,
+                  rng=np.random):
+    if dist <= 0:
+        return discPoints(n, cx, cy, maxDist, rng)
+    xs = np.zeros(0) if px is None else np.asarray(px, dtype=float)
+    ys = np.zeros(0) if py is None else np.asarray(py, dtype=float)
+    have = len(xs)
+    ratio = 1.0
+    while len(xs) - have < n:
+        need = n - (len(xs) - have)
+        # draw enough candidates for the acceptance ratio of the last round
+        m = int(min(need / ratio * 1.1, rounds * need)) + 16
+        x, y = discPoints(m, cx, cy, maxDist, rng)
+        # too close to a node that was already placed
+        i, j = closePairs(x, y, xs, ys, dist)
+        ok = np.ones(m, dtype=bool)
+        ok[i] = False
+        x = x[ok]
+        y = y[ok]
+        # too close to an earlier candidate of this round
+        i, j = closePairs(x, y, x, y, dist)
+        ok = np.ones(len(x), dtype=bool)
+        ok[i[j < i]] = False
+        x = x[ok][:need]
+        y = y[ok][:need]
+        if len(x) == 0 and m >= rounds * need:
+            return None
+        xs = np.concatenate((xs, x))
+        ys = np.concatenate((ys, y))
+        ratio = max(np.count_nonzero(ok) / float(m), 1.0 / rounds)
+    return xs[have:], ys[have:]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: plots of the simulated topologies
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    matplotlib is only imported when the first plot is made, so runs
+    without graphics never load it. By default the offscreen Agg backend is
+    used and the plot is written to a file, which also works on machines
+    without a display; only plots that are shown on screen use the default
+    (interactive) backend of matplotlib.
+
+    All nodes are drawn with a single scatter call and the ranges of the
+    base stations as one collection, so plotting 100k nodes takes about as
+    long as plotting 100.
+"""
+
+import numpy as np
+
+# backend for plots that are not shown on screen
+backend = "Agg"
+
+# default file of the topology plot
+topologyFile = "topology.png"
+
+# matplotlib.pyplot, once imported
+plt = None
+
+#
+# import matplotlib.pyplot, offscreen unless the plot is shown
+#
+def pyplot(show=False):
+    global plt
+    if plt is None:
+        import matplotlib
+        if not show:
+            matplotlib.use(backend)
+        import matplotlib.pyplot
+        plt = matplotlib.pyplot
+    return plt
+
+#
+# plot the base stations, their range and the nodes of a built simulation
+# the nodes get the colour of their own base station (the first colour if
+# they have none), area is the (width, height) of a rectangle to outline
+#
+def topology(sim, xmax, ymax, colors=("blue",), bsColors=("green",), rangeColors=None,
+             area=None, show=False, fname=topologyFile):
+    plt = pyplot(show)
+    from matplotlib.patches import Circle, Rectangle
+    from matplotlib.collections import PatchCollection
+    if rangeColors is None:
+        rangeColors = bsColors
+
+    fig = plt.figure()
+    ax = fig.gca()
+    if area is not None:
+        ax.add_patch(Rectangle((0, 0), area[0], area[1], fill=None, alpha=1))
+
+    nb = len(sim.bs)
+    ax.add_collection(PatchCollection([Circle((b.x, b.y), sim.maxDist) for b in sim.bs],
+                                      facecolor="none",
+                                      edgecolor=[rangeColors[i % len(rangeColors)] for i in range(0, nb)]))
+    ax.scatter([b.x for b in sim.bs], [b.y for b in sim.bs], s=30, zorder=3,
+               c=[bsColors[i % len(bsColors)] for i in range(0, nb)])
+
+    n = len(sim.nodes)
+    x = np.fromiter((node.x for node in sim.nodes), float, n)
+    y = np.fromiter((node.y for node in sim.nodes), float, n)
+    own = np.fromiter((node.bs.id if node.bs is not None else 0 for node in sim.nodes), int, n)
+    ax.scatter(x, y, s=4, linewidths=0, c=list(np.array(colors)[own % len(colors)]))
+
+    ax.set_xlim([0, xmax])
+    ax.set_ylim([0, ymax])
+    ax.set_aspect("equal")
+    if show:
+        plt.ion()
+        plt.show()
+        plt.pause(0.001)
+    else:
+        fig.savefig(fname)
+        plt.close(fig)
+    return fname
+
+#
+# keep a plot on screen until Enter is pressed
+#
+def wait():
+    try:
+        prompt = raw_input
+    except NameError:
+        prompt = input
+    prompt('Press Enter to continue ...')
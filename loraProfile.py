@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: profilers of a simulation run
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    The counters and phase times of a run are always in its Results (see
+    loraSim.py); a profiler shows where the time within a phase goes. Both
+    are started before the run and stopped after it, and dump() writes
+    their output next to the run output, with the given file name stem:
+
+    cprofile  deterministic profile of every function call (cProfile),
+              <stem>.prof for pstats or snakeviz and <stem>.txt with the
+              functions with the most cumulative time. Slows the run down
+              about two times.
+    sample    samples the stack of the simulating thread every interval
+              seconds from a second thread, <stem>.folded with one
+              "caller;...;function count" line per stack, as read by
+              flamegraph.pl and speedscope. Costs a few percent.
+
+        prof = loraProfile.profiler("sample")
+        prof.start()
+        res = sim.run()
+        prof.stop()
+        prof.dump("results/run1")
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+
+# seconds between two samples
+sampleInterval = 0.001
+
+# functions in the text summary of cprofile
+summaryLines = 40
+
+class CProfiler():
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    # write <stem>.prof and <stem>.txt, returns the file names
+    def dump(self, stem):
+        self.profile.dump_stats(stem + ".prof")
+        with open(stem + ".txt", "w") as f:
+            stats = pstats.Stats(self.profile, stream=f)
+            stats.sort_stats("cumulative").print_stats(summaryLines)
+        return [stem + ".prof", stem + ".txt"]
+
+class Sampler():
+    def __init__(self, interval=sampleInterval):
+        self.interval = interval
+        # number of samples per stack, a tuple of "file:function" outermost first
+        self.stacks = {}
+        self.samples = 0
+        self.running = False
+        self.thread = None
+
+    # sample the thread that calls start()
+    def start(self):
+        self.target = threading.current_thread().ident
+        self.running = True
+        self.thread = threading.Thread(target=self.sample)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def sample(self):
+        while self.running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            stack = tuple(reversed(stack))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples = self.samples + 1
+
+    # write <stem>.folded, returns the file names
+    def dump(self, stem):
+        with open(stem + ".folded", "w") as f:
+            for stack, n in sorted(self.stacks.items()):
+                f.write("{} {}\n".format(";".join(stack), n))
+        return [stem + ".folded"]
+
+profilers = {"cprofile": CProfiler, "sample": Sampler}
+
+#
+# profiler by name
+#
+def profiler(name):
+    return profilers[name]()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: random number streams of a simulation run
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    All random numbers of a run come from streams derived from the seed of
+    the run (the --seed option of every script), each by hashing the seed
+    with the name of the stream:
+
+    topology        node positions (random.Random and a NumPy RandomState)
+    config, <node>  the radio settings of the packets of one node
+    traffic, <node> the gaps between the transmissions of one node, block
+                    <block> seeded from this key and the block number
+    traffic         the transmissions of the batch engine
+
+    The gaps of a node are drawn with NumPy a block at a time and handed out
+    by a C level iterator, which is cheaper than a call of expovariate()
+    per packet. A node only keeps the key of its stream (nodeTraffic(),
+    hashed once); every block is drawn by a generator shared by all nodes,
+    reseeded with blockSeed() of the key and the block number, so no node
+    holds a generator state of its own. Since every block is derived from
+    the node id and the block number only, the traffic and the settings of
+    a node do not depend on the other nodes: adding or removing nodes, or
+    the order in which nodes send, leaves the traffic of all other nodes
+    unchanged.
+
+    Replications of a run get their own seeds, derived from a root seed and
+    the replication number (see loraRunner.py), so replications can run in
+    any order and in parallel and still be repeated one by one.
+
+    A block holds blockSize gaps. With the simpy and heap engines a node
+    holds its block as a list of Python floats and the iterator over it,
+    about 2.5 kB per node (250 MB for 100000 nodes); the slots engine holds
+    the blocks of all nodes in one array, 0.5 kB per node. The size is
+    fixed: with another block size the same seed gives other gaps.
+"""
+
+import random
+import hashlib
+import itertools
+import numpy as np
+
+# gaps per block of a node
+blockSize = 64
+
+#
+# 32 bit seed of the stream key of the run with the given seed, the same on
+# every platform and Python version
+#
+def derive(seed, *key):
+    s = ":".join(str(k) for k in (seed,) + key)
+    return int(hashlib.sha256(s.encode("ascii")).hexdigest()[:8], 16)
+
+#
+# seed of replication rep of the run with root seed rootSeed
+#
+def replicationSeed(rootSeed, rep):
+    return derive(rootSeed, rep)
+
+#
+# take "--seed <n>" out of the command line argv of a script, returns the
+# other arguments and the seed (None without the option)
+#
+def seedArg(argv):
+    argv = list(argv)
+    if "--seed" not in argv:
+        return argv, None
+    i = argv.index("--seed")
+    if i + 1 >= len(argv):
+        raise ValueError("--seed needs a value")
+    seed = int(argv[i + 1])
+    del argv[i:i + 2]
+    return argv, seed
+
+#
+# 32 bit seed of block b of the stream with key (from Streams.nodeTraffic()):
+# the finalizer of MurmurHash3 on the key and the block number, far cheaper
+# than derive() for every block
+#
+def blockSeed(key, b):
+    x = (key ^ (b * 0x9E3779B9)) & 0xFFFFFFFF
+    x = ((x ^ (x >> 16)) * 0x85EBCA6B) & 0xFFFFFFFF
+    x = ((x ^ (x >> 13)) * 0xC2B2AE35) & 0xFFFFFFFF
+    return x ^ (x >> 16)
+
+class Streams():
+    def __init__(self, seed):
+        self.seed = seed
+        self.topology = random.Random(derive(seed, "topology"))
+        self.nptopology = np.random.RandomState(derive(seed, "topology"))
+        self.traffic = np.random.RandomState(derive(seed, "traffic"))
+        # reseeded for every block or node
+        self.blockRandom = np.random.RandomState(0)
+        self.configRandom = random.Random(0)
+
+    #
+    # generator of the settings of the packets of node nodeid
+    # (draws of the previous node are discarded)
+    #
+    def config(self, nodeid):
+        self.configRandom.seed(derive(self.seed, "config", nodeid))
+        return self.configRandom
+
+    #
+    # key of the traffic stream of node nodeid, see block()
+    #
+    def nodeTraffic(self, nodeid):
+        return derive(self.seed, "traffic", nodeid)
+
+    #
+    # block b of the gaps (mean period) of the stream with key, an array of
+    # blockSize
+    #
+    def block(self, key, period, b):
+        self.blockRandom.seed(blockSeed(int(key), int(b)))
+        return self.blockRandom.exponential(period, blockSize)
+
+    def blocks(self, nodeid, period):
+        key = self.nodeTraffic(nodeid)
+        for b in itertools.count():
+            yield self.block(key, period, b).tolist()
+
+    #
+    # iterator over the exponentially distributed gaps (mean period) between
+    # the transmissions of node nodeid
+    #
+    def gaps(self, nodeid, period):
+        return itertools.chain.from_iterable(self.blocks(nodeid, float(period)))
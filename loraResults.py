@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: results store for simulation runs
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ SYNOPSIS:
+   ./loraResults.py merge [dir]
+   ./loraResults.py table [dir] [--where <column>=<value> ...] [--columns <a,b,...>]
+                          [--csv <file>]
+ DESCRIPTION:
+    Every simulation run is recorded as one shard: a small JSON file with
+    the metadata of the run (script, command line, all scenario parameters,
+    seed, wall time, events processed, host) and all its metrics. A shard
+    gets a unique name and is written to a temporary file that is renamed
+    when complete, so any number of runs can record into the same directory
+    at the same time and a reader never sees half a run.
+
+    merge folds the shards into runs.npz in the same directory, one array
+    per column and one entry per run, and removes them. Columns a run does
+    not have (e.g. the per base station DER of loraDir.py) are NaN or "".
+    Only one merge runs at a time, it holds the lock file .merge.lock with
+    its host and process id; a lock of a merge that died (its process is
+    gone, or on another host older than staleLock) is broken by the next
+    merge. load() returns the merged runs plus the shards recorded since,
+    so a sweep can be queried while it is still running:
+
+        runs = loraResults.load("results")
+        sel = (runs["experiment"] == 0) & (runs["full_collision"] == 1)
+        print (runs["nrNodes"][sel], runs["der"][sel])
+
+    A run is identified by its id: shards that are already in runs.npz (the
+    merge publishes runs.npz before it removes them) are left out by load()
+    and by the next merge.
+
+    table prints the selected runs as a space separated table with a
+    commented header line (default columns nrNodes nrCollisions sent energy
+    der), e.g. for gnuplot, or writes all columns to a CSV file.
+ EXAMPLE
+    > python loraResults.py table results --where experiment=0 --columns nrNodes,der
+"""
+
+import os
+import csv
+import errno
+import json
+import time
+import socket
+import argparse
+import itertools
+import numpy as np
+
+# default directory of the store
+resultsDir = "results"
+
+# merged runs, in the store directory
+mergedName = "runs.npz"
+
+# columns of the table command
+defaultColumns = ["nrNodes", "nrCollisions", "sent", "energy", "der"]
+
+# shard names made by this process
+counter = itertools.count()
+
+# age in seconds of a merge lock of another host that is taken as stale
+staleLock = 3600
+
+#
+# record a run: script, argv, the scenario and results of loraSim.py
+# returns the name of the shard
+#
+def record(script, argv, sim, res, directory=resultsDir, **extra):
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # made by a concurrent run
+            if not os.path.isdir(directory):
+                raise
+    host = socket.gethostname()
+    runid = "{}-{}-{}-{}".format(time.strftime("%Y%m%d%H%M%S"), host, os.getpid(), next(counter))
+    row = {"id": runid, "script": os.path.basename(script), "argv": " ".join(argv),
+           "simulation": type(sim).__name__, "host": host, "time": time.time()}
+    for name, value in sim.scenario.params().items():
+        row[name] = value
+    for name, value in res.metrics().items():
+        row[name] = value
+    row.update(extra)
+    for name, value in row.items():
+        if isinstance(value, np.generic):
+            row[name] = value.item()
+        elif value is None:
+            row[name] = ""
+    fname = os.path.join(directory, runid + ".json")
+    tmp = os.path.join(directory, "." + runid + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(row, f, sort_keys=True)
+    os.rename(tmp, fname)
+    return fname
+
+#
+# shards in the store, oldest first
+#
+def shards(directory=resultsDir):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                  if f.endswith(".json"))
+
+# shards removed by a merge since they were listed are left out
+def readShards(files):
+    rows = []
+    for fname in files:
+        try:
+            with open(fname) as f:
+                rows.append(json.load(f))
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+    return rows
+
+#
+# the rows that are not in the merged runs yet
+#
+def newRows(merged, rows):
+    if not merged:
+        return rows
+    ids = set(merged["id"].tolist())
+    return [r for r in rows if r["id"] not in ids]
+
+#
+# rows (dicts) to columns (arrays), missing values are NaN or ""
+#
+def columns(rows):
+    names = set()
+    for r in rows:
+        names.update(r.keys())
+    cols = {}
+    for name in names:
+        values = [r.get(name) for r in rows]
+        present = [v for v in values if v is not None and v != ""]
+        if all(isinstance(v, (bool, int, float)) for v in present):
+            if len(present) == len(values) and all(isinstance(v, (bool, int)) for v in present):
+                cols[name] = np.array(values, dtype=np.int64)
+            else:
+                cols[name] = np.array([float("nan") if v is None or v == "" else v
+                                       for v in values], dtype=float)
+        else:
+            cols[name] = np.array(["" if v is None else str(v) for v in values])
+    return cols
+
+#
+# empty values for n runs of a column like col
+#
+def missing(col, n):
+    if col.dtype.kind in "iuf":
+        return np.full(n, float("nan"))
+    return np.array([""] * n, dtype=col.dtype)
+
+#
+# append the columns of b to those of a
+#
+def concat(a, b):
+    na = len(next(iter(a.values()))) if a else 0
+    nb = len(next(iter(b.values()))) if b else 0
+    if not nb:
+        return a
+    if not na:
+        return b
+    out = {}
+    for name in set(a) | set(b):
+        ca = a[name] if name in a else missing(b[name], na)
+        cb = b[name] if name in b else missing(a[name], nb)
+        if (ca.dtype.kind in "iuf") != (cb.dtype.kind in "iuf"):
+            ca = ca.astype(str)
+            cb = cb.astype(str)
+        out[name] = np.concatenate((ca, cb))
+    return out
+
+def loadMerged(directory=resultsDir):
+    fname = os.path.join(directory, mergedName)
+    if not os.path.isfile(fname):
+        return {}
+    with np.load(fname, allow_pickle=False) as data:
+        return dict((name, data[name]) for name in data.files)
+
+#
+# all runs in the store, as a dict of column arrays
+# the shards are read before runs.npz: a shard that is gone by then has
+# been merged into it
+#
+def load(directory=resultsDir):
+    rows = readShards(shards(directory))
+    merged = loadMerged(directory)
+    return concat(merged, columns(newRows(merged, rows)))
+
+#
+# whether the process pid on this host still runs
+#
+def running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+#
+# holder of a lock file: its content (host, process id and time of the
+# merge) and its mtime; None when there is no lock
+#
+def lockHolder(lock):
+    try:
+        with open(lock) as f:
+            content = f.read()
+        return content, os.path.getmtime(lock)
+    except (IOError, OSError):
+        return None
+
+#
+# whether holder (from lockHolder()) is a merge that died: its process is
+# gone, or the lock of another host is older than staleLock
+#
+def staleMerge(holder):
+    if holder is None:
+        # just released
+        return False
+    fields = holder[0].split()
+    age = time.time() - holder[1]
+    if len(fields) < 2 or not fields[1].isdigit():
+        # not written yet, or by a merge that died right after creating it
+        return age > staleLock
+    if fields[0] == socket.gethostname():
+        return not running(int(fields[1]))
+    return age > staleLock
+
+def createLock(lock):
+    fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    os.write(fd, "{} {} {!r}".format(socket.gethostname(), os.getpid(),
+                                     time.time()).encode("ascii"))
+    os.close(fd)
+    return lock
+
+#
+# break the stale lock of holder: the lock is renamed to a name of this
+# process (atomic, only one merge gets it) and checked again; a lock that a
+# live merge took in the meantime is put back with link(), which fails
+# rather than replace a lock, and OSError (EEXIST) is raised
+#
+def breakLock(lock, holder):
+    broken = "{}.{}.{}".format(lock, socket.gethostname(), os.getpid())
+    try:
+        os.rename(lock, broken)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        # broken or released by another merge
+        return
+    if lockHolder(broken) != holder:
+        try:
+            os.link(broken, lock)
+        finally:
+            os.remove(broken)
+        raise OSError(errno.EEXIST, "merge in progress", lock)
+    os.remove(broken)
+
+#
+# take the merge lock of directory, breaking a stale one; raises OSError
+# (EEXIST) while another merge runs
+#
+def lockMerge(directory):
+    lock = os.path.join(directory, ".merge.lock")
+    try:
+        return createLock(lock)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+        holder = lockHolder(lock)
+        if not staleMerge(holder):
+            raise
+    breakLock(lock, holder)
+    return createLock(lock)
+
+#
+# fold the shards into runs.npz, returns the number of runs merged
+# only one merge may run at a time, concurrent runs may keep recording
+#
+def merge(directory=resultsDir):
+    lock = lockMerge(directory)
+    try:
+        files = shards(directory)
+        if not files:
+            return 0
+        merged = loadMerged(directory)
+        rows = newRows(merged, readShards(files))
+        runs = concat(merged, columns(rows))
+        tmp = os.path.join(directory, ".runs.tmp.npz")
+        np.savez(tmp, **runs)
+        os.rename(tmp, os.path.join(directory, mergedName))
+        for fname in files:
+            os.remove(fname)
+        return len(rows)
+    finally:
+        os.remove(lock)
+
+#
+# runs whose column name equals value (compared as numbers if possible)
+#
+def select(runs, where):
+    if not runs:
+        return np.zeros(0, dtype=bool)
+    sel = np.ones(len(runs["id"]), dtype=bool)
+    for cond in where:
+        name, value = cond.split("=", 1)
+        if name not in runs:
+            return np.zeros(len(sel), dtype=bool)
+        col = runs[name]
+        if col.dtype.kind in "iuf":
+            if value in ["True", "False"]:
+                value = int(value == "True")
+            sel = sel & (col == float(value))
+        else:
+            sel = sel & (col == value)
+    return sel
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="./loraResults.py merge|table [dir] [options]")
+    parser.add_argument("command", choices=["merge", "table"])
+    parser.add_argument("dir", nargs="?", default=resultsDir)
+    parser.add_argument("--where", action="append", default=[],
+                        help="only runs with <column>=<value>, may be repeated")
+    parser.add_argument("--columns", default=",".join(defaultColumns),
+                        help="columns of the table (default: %(default)s)")
+    parser.add_argument("--csv", help="write the selected runs, all columns, to this file")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        print ("merged {} runs into {}".format(merge(args.dir), os.path.join(args.dir, mergedName)))
+        return
+
+    runs = load(args.dir)
+    sel = select(runs, args.where)
+    order = np.argsort(runs["time"][sel], kind="mergesort") if runs else []
+    if args.csv:
+        names = sorted(runs)
+        with open(args.csv, "w") as f:
+            w = csv.writer(f)
+            w.writerow(names)
+            for i in np.nonzero(sel)[0][order]:
+                w.writerow([runs[n][i] for n in names])
+        return
+    names = args.columns.split(",")
+    print ("#" + " ".join(names))
+    for i in np.nonzero(sel)[0][order]:
+        print (" ".join(str(runs[n][i]) if n in runs else "nan" for n in names))
+
+if __name__ == "__main__":
+    main()
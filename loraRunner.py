@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: run replications of loraDir.py in parallel
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ SYNOPSIS:
+   ./loraRunner.py <nodes> <avgsend> <experiment> <simtime> [collision]
+                   [--reps <n>] [--jobs <n>] [--seed <n>] [--out <file>]
+                   [loraDir.py options]
+ DESCRIPTION:
+    nodes, avgsend, experiment, simtime, collision
+        as for loraDir.py. Every argument may be a comma separated list of
+        values; all combinations of the values are simulated (a sweep).
+    --reps
+        number of replications per parameter point (default 10)
+    --jobs
+        number of worker processes (default: one per core)
+    --seed
+        root seed (default 12345). Replication r of every parameter point is
+        run with the same seed, derived from the root seed and r (see
+        loraRandom.py), so the points are compared on common random numbers.
+    --out
+        also append the summary table to this file
+    Any other option (--engine, --aloha, --placement, --mindist, --profile,
+    --record) is parsed as by loraDir.py. Graphics are always off. With
+    --profile every replication writes its profile next to its run in the
+    store; with --record <file> replication r of point p writes its own
+    trace <file>.p<p>.r<r> (see traceName()), the workers never share one.
+
+    The workers stay alive between replications and run the simulations
+    in-process through loraSim.py, so NumPy, SimPy and the simulator are
+    only imported once per core. Every replication is recorded in the
+    results store (--results of loraDir.py, see loraResults.py) together
+    with its replication number and the root seed; the store is merged at
+    the end of the sweep.
+ OUTPUT
+    One line per parameter point with the mean and the 95% confidence
+    interval (Student t) over the replications of collisions, transmissions,
+    energy and DER.
+ EXAMPLE
+    > python loraRunner.py 100,200,500 1000000 0,4 500000000 --reps 20
+"""
+
+import os
+import math
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+import loraDir
+import loraResults
+import loraRandom
+import loraProfile
+from loraSim import Simulation, SimulationError
+
+# metrics reported per replication
+metrics = ["collisions", "sent", "received", "processed", "lost", "energy", "der", "der2"]
+
+# two-sided 95% quantiles of the Student t distribution, by degrees of freedom
+tTable = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+          2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+          2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def tQuantile(df):
+    if df <= 0:
+        return float("nan")
+    if df <= len(tTable):
+        return tTable[df - 1]
+    return 1.960
+
+#
+# trace file of replication rep of parameter point of --record <fname>
+#
+def traceName(fname, point, rep):
+    return "{}.p{}.r{}".format(fname, point, rep)
+
+#
+# run one replication in this process and return its counters
+#
+def runOnce(task):
+    point, rep, rootSeed, seed, argv = task
+    sc, args = loraDir.parseArgs(argv, seed=seed)
+    if args.record:
+        sc.traceFile = traceName(args.record, point, rep)
+    sim = Simulation(sc)
+    prof = None
+    if args.profile:
+        prof = loraProfile.profiler(args.profile)
+        prof.start()
+    try:
+        r = sim.run()
+    except SimulationError:
+        return point, rep, seed, None
+    finally:
+        if prof:
+            prof.stop()
+    fname = loraResults.record("loraRunner.py", argv, sim, r, args.results, rep=rep, rootSeed=rootSeed)
+    if prof:
+        prof.dump(os.path.splitext(fname)[0])
+    res = {"collisions": r.nrCollisions, "sent": r.sent, "received": r.nrReceived,
+           "processed": r.nrProcessed, "lost": r.nrLost, "energy": r.energy,
+           "der": r.der, "der2": r.der2}
+    return point, rep, seed, res
+
+#
+# mean and half width of the 95% confidence interval
+#
+def meanCI(values):
+    v = np.asarray(values, dtype=float)
+    n = len(v)
+    if n == 0:
+        return float("nan"), float("nan")
+    if n == 1:
+        return v[0], float("nan")
+    return v.mean(), tQuantile(n - 1) * v.std(ddof=1) / math.sqrt(n)
+
+def intList(s):
+    return [int(v) for v in s.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="./loraRunner.py <nodes> <avgsend> <experiment> <simtime> [collision] [options]")
+    parser.add_argument("nodes", type=intList)
+    parser.add_argument("avgsend", type=intList)
+    parser.add_argument("experiment", type=intList)
+    parser.add_argument("simtime", type=intList)
+    parser.add_argument("collision", type=intList, nargs="?", default=[0])
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--out")
+    args, extra = parser.parse_known_args()
+
+    points = list(itertools.product(args.nodes, args.avgsend, args.experiment,
+                                    args.simtime, args.collision))
+    # fail here, not in the workers, on options loraDir.py does not know
+    sc, dirArgs = loraDir.parseArgs([str(v) for v in points[0]] + extra)
+    tasks = []
+    for p, point in enumerate(points):
+        argv = [str(v) for v in point] + extra
+        for rep in range(0, args.reps):
+            tasks.append((p, rep, args.seed, loraRandom.replicationSeed(args.seed, rep), argv))
+
+    print ("points: {} replications: {} workers: {}".format(len(points), args.reps, args.jobs))
+    results = [[] for p in points]
+    failed = 0
+    pool = multiprocessing.Pool(args.jobs)
+    try:
+        for p, rep, seed, res in pool.imap_unordered(runOnce, tasks):
+            if res is None:
+                failed = failed + 1
+                print ("point {} replication {} (seed {}) failed".format(points[p], rep, seed))
+            else:
+                results[p].append(res)
+    finally:
+        pool.close()
+        pool.join()
+    try:
+        loraResults.merge(dirArgs.results)
+    except OSError:
+        # another sweep is merging the store, our shards stay until the next merge
+        pass
+
+    header = "#nrNodes avgSend experiment simtime collision reps " + \
+        " ".join("{0} {0}CI".format(m) for m in metrics)
+    lines = [header]
+    for p, point in enumerate(points):
+        row = [str(v) for v in point] + [str(len(results[p]))]
+        for m in metrics:
+            mean, ci = meanCI([r[m] for r in results[p]])
+            row.append("{:.6g} {:.6g}".format(mean, ci))
+        lines.append(" ".join(row))
+    print ("\n".join(lines))
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write("\n".join(lines) + "\n")
+    if failed:
+        exit(-1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1478 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: simulation API shared by the command line scripts
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+
+ Do LoRa Low-Power Wide-Area Networks Scale? Martin Bor, Utz Roedig, Thiemo Voigt
+ and Juan Alonso, MSWiM '16, http://dx.doi.org/10.1145/2988287.2989163
+
+ Mitigating Inter-Network Interference in LoRa Low-Power Wide-Area Networks,
+ Thiemo Voigt, Martin Bor, Utz Roedig, and Juan Alonso, EWSN '17
+"""
+
+"""
+ DESCRIPTION:
+    A Scenario holds the parameters of a run, a Simulation runs it and
+    returns a Results object. All state of a run (SimPy environment, nodes,
+    base stations, packets at the base stations, counters and the random
+    generators) lives in the Simulation, so any number of simulations can be
+    built and run in the same process, one after the other or in threads.
+
+        sc = Scenario(100, 1000000, 0, 500000000, full_collision=True, seed=1)
+        res = Simulation(sc).run()
+        print (res.der)
+
+    Every call of run() builds a new topology. Call build() first to look at
+    the nodes (e.g. to plot them) before running that same topology.
+
+    Besides the metrics, Results holds counters of the run (events,
+    collision checks, packets compared, timing and power evaluations, the
+    most packets in the air and the most packets that reach a base station
+    at the same time, see loraGateway.py) and the seconds spent in each
+    phase: placement of the nodes, configuration of their packets, the run
+    itself and reporting. See loraProfile.py to profile a run. With the
+    traceFile option the simpy and heap engines also write every packet to
+    a binary trace, whose collisions loraTrace.py resolves again offline.
+
+    Simulation                one base station (loraDir.py)
+    MultiBSSimulation         nrBS base stations, nodes spread over a
+                              rectangle (loraDirMulBS.py)
+    DirectionalSimulation     nrNodes nodes around each of nrBS base stations,
+                              optionally directional antennae at the nodes
+                              (directionalLoraIntf.py)
+    OneDirectionalSimulation  as above, only the nodes of base station 0 are
+                              directional (oneDirectionalLoraIntf.py)
+
+    With more than one base station every node sends a "virtual" packet to
+    each base station; packets below the sensitivity are marked lost but
+    still interfere with the other packets at that base station. Base
+    stations are placed by the fixed layouts of the scripts, or in any
+    number on a hexagonal lattice, a square grid or from a file (see
+    loraLayout.py); with links "range" a node only sends to the base
+    stations it may reach or disturb.
+
+    The receiver of every base station (loraGateway.py) has maxBSReceives
+    demodulator paths. With one base station a packet without a free path
+    only does not count as processed; with more base stations it is not
+    received at that base station either.
+"""
+
+import math
+import random
+import time
+import logging
+import numpy as np
+import simpy
+from loraCollision import CollisionIndex, frequencyCollision, sfCollision, \
+    powerCollision, timingCollision, powerThreshold
+import loraBatch
+import loraSlots
+import loraEvents
+import loraPlacement
+import loraRandom
+import loraAirtime
+import loraAntenna
+import loraLayout
+import loraTrace
+import loraLog
+from loraLog import log
+from loraAirtime import airtime
+from loraGateway import Gateway
+from loraMetrics import Metrics
+import loraMetrics
+
+# this is an array with measured values for sensitivity
+# see paper, Table 3
+sf7 = np.array([7,-126.5,-124.25,-120.75])
+sf8 = np.array([8,-127.25,-126.75,-124.0])
+sf9 = np.array([9,-131.25,-128.25,-127.5])
+sf10 = np.array([10,-132.75,-130.25,-128.75])
+sf11 = np.array([11,-134.5,-132.75,-128.75])
+sf12 = np.array([12,-133.25,-132.25,-132.25])
+sensi = np.array([sf7,sf8,sf9,sf10,sf11,sf12])
+
+# Transmit consumption in mA from -2 to +17 dBm
+TX = [22, 22, 22, 23,                                      # RFO/PA0: -2..1
+      24, 24, 24, 25, 25, 25, 25, 26, 31, 32, 34, 35, 44,  # PA_BOOST/PA1: 2..14
+      82, 85, 90,                                          # PA_BOOST/PA1: 15..17
+      105, 115, 125]                                       # PA_BOOST/PA1+PA2: 18..20
+V = 3.0     # voltage XXX
+
+class SimulationError(Exception):
+    pass
+
+#
+# parameters of a simulation run
+# the class attributes are the defaults of the options
+#
+class Scenario():
+    # do the full collision check
+    full_collision = False
+    # packet length in Bytes
+    packetLength = 20
+    # log-distance path loss model
+    Ptx = 14
+    gamma = 2.08
+    d0 = 40.0
+    var = 0           # variance ignored for now
+    Lpld0 = 127.41
+    GL = 0
+    # maximum number of packets the BS can receive at the same time
+    maxBSReceives = 8
+    # medium access: "pure" or "slotted" ALOHA, slot length in ms; with
+    # slotted ALOHA a transmission starts guardTime ms after the start of
+    # a slot
+    aloha = "pure"
+    slotTime = 1000
+    guardTime = 0
+    # "simpy", "heap" (see loraEvents.py), "batch" (see loraBatch.py) or
+    # "slots" (slotted ALOHA only, see loraSlots.py), the last two for one
+    # base station only
+    engine = "simpy"
+    # "grid" or "bulk" (one base station only, see loraPlacement.py)
+    placement = "grid"
+    # minimum distance between two nodes in m, 0 to disable; None for
+    # loraPlacement.minDist with one base station and no minimum distance
+    # with more (see Simulation.nodeDistance())
+    minDist = None
+    # more than one base station
+    nrBS = 1
+    # position of the base stations: "fixed", "hex", "grid" or a file of
+    # positions, generated layouts baseDist apart (0 for a spacing that
+    # covers the area), see loraLayout.py
+    layout = "fixed"
+    # links of a node: to "all" base stations, or only to the ones in
+    # "range" (see MultiBSSimulation.linkBudget); None for all with the
+    # fixed layout and range with the others
+    links = None
+    directionality = 0
+    # gain pattern of directional antennae, see loraAntenna.py
+    antenna = "step"
+    # networks of the directional scenario: base station b belongs to
+    # network b % nrNetworks, a node to the network of its base station
+    nrNetworks = 1
+    baseDist = 0.0
+    # keep the sequence numbers of all packets (see loraMetrics.py)
+    trace = False
+    # write every transmission to this binary trace (simpy and heap
+    # engines, see loraTrace.py), None for no trace
+    traceFile = None
+    # seed of the random generators of the run, None for a random seed
+    seed = None
+    # messages to the lorasim logger: 0 silent, 1 info, 2 error, 3 debug
+    # (see loraLog.py)
+    verbose = 0
+
+    def __init__(self, nrNodes, avgSendTime, experiment, simtime, **options):
+        self.nrNodes = nrNodes
+        self.avgSendTime = avgSendTime
+        self.experiment = experiment
+        self.simtime = simtime
+        for name, value in options.items():
+            if name.startswith("_") or not hasattr(Scenario, name):
+                raise TypeError("unknown scenario option '{}'".format(name))
+            setattr(self, name, value)
+
+    # all parameters of the scenario, by name
+    def params(self):
+        p = {}
+        for name in dir(Scenario):
+            if not name.startswith("_") and not callable(getattr(Scenario, name)):
+                p[name] = getattr(self, name)
+        p["nrNodes"] = self.nrNodes
+        p["avgSendTime"] = self.avgSendTime
+        p["experiment"] = self.experiment
+        p["simtime"] = self.simtime
+        return p
+
+#
+# results of a simulation run
+#
+class Results():
+    def __init__(self, scenario):
+        self.scenario = scenario
+        # transmissions of all nodes
+        self.sent = 0
+        # packets (per base station) that collided, were received, got a
+        # demodulator path or were below the sensitivity
+        self.nrCollisions = 0
+        self.nrReceived = 0
+        self.nrProcessed = 0
+        self.nrLost = 0
+        # energy spent on transmissions in J
+        self.energy = 0.0
+        # data extraction rate
+        self.der = float("nan")
+        self.der2 = float("nan")
+        # more than one base station
+        self.receivedPerBS = []
+        self.sentPerBS = []
+        self.derPerBS = []
+        self.avgDER = float("nan")
+        # per network, transmissions of its nodes and those received by at
+        # least one of its base stations
+        self.sentPerNetwork = []
+        self.receivedPerNetwork = []
+        self.derPerNetwork = []
+        # per spreading factor (index sf - 6), packets at the base stations
+        self.receivedPerSF = []
+        self.collidedPerSF = []
+        self.lostPerSF = []
+        # transmissions of each node received by at least one base station,
+        # not part of metrics()
+        self.receivedPerNode = []
+        # per base station, fraction of the time k demodulator paths were busy
+        self.pathOccupancy = []
+        # transmissions by the number of base stations that received them,
+        # and per base station those it received with the strongest signal
+        self.diversity = []
+        self.bestPerBS = []
+        # seed the run was made with, seconds spent on building the topology
+        # and on the simulation itself
+        self.seed = None
+        self.buildTime = 0.0
+        self.runTime = 0.0
+        # seconds spent per phase: placement, configuration, run, reporting
+        self.phaseTime = {}
+        # counters: events processed, checkcollision() calls, packets
+        # compared, timingCollision() and powerCollision() evaluations, and
+        # per base station the most packets in the air at the same time
+        # (the peak length of packetsAtBS, lost interferers included) and
+        # the most of them that reach it
+        self.events = 0
+        self.checks = 0
+        self.comparisons = 0
+        self.timingChecks = 0
+        self.powerChecks = 0
+        self.peakInFlight = []
+        self.peakReceiving = []
+
+    # all metrics by name, the lists flattened to name.0, name.1, ...
+    def metrics(self):
+        m = {}
+        for name in ["sent", "nrCollisions", "nrReceived", "nrProcessed", "nrLost",
+                     "energy", "der", "der2", "avgDER", "seed", "events", "checks",
+                     "comparisons", "timingChecks", "powerChecks", "buildTime", "runTime"]:
+            m[name] = getattr(self, name)
+        m["wallTime"] = self.buildTime + self.runTime
+        for name, t in self.phaseTime.items():
+            m["phaseTime." + name] = t
+        for name in ["receivedPerBS", "sentPerBS", "derPerBS", "sentPerNetwork",
+                     "receivedPerNetwork", "derPerNetwork", "diversity", "bestPerBS",
+                     "peakInFlight", "peakReceiving"]:
+            for i, v in enumerate(getattr(self, name)):
+                m["{}.{}".format(name, i)] = v
+        for name in ["receivedPerSF", "collidedPerSF", "lostPerSF"]:
+            for i, v in enumerate(getattr(self, name)):
+                m["{}.sf{}".format(name, i + loraMetrics.minSF)] = v
+        for i, occ in enumerate(self.pathOccupancy):
+            for k, v in enumerate(occ):
+                m["pathOccupancy.{}.{}".format(i, k)] = v
+        return m
+
+#
+# this function creates a BS
+#
+class myBS():
+    def __init__(self, id, x, y):
+        self.id = id
+        self.x = x
+        self.y = y
+
+#
+# this function creates a node
+# packet is a single packet with one base station, otherwise a list with
+# one "virtual" packet (myLink) per base station it may reach or disturb
+# (and dist the distances of all its links)
+#
+class myNode():
+    def __init__(self, nodeid, bs, period, x, y):
+        self.nodeid = nodeid
+        self.bs = bs
+        self.period = period
+        self.x = x
+        self.y = y
+        self.dist = []
+        self.packet = []
+        self.sent = 0
+        # sequence number of the current transmission
+        self.seqNr = 0
+        # iterator over the gaps between its transmissions
+        self.gaps = None
+        # more than one base station: packets that reach their BS, packets
+        # below the sensitivity that may still interfere, the number of
+        # links below the sensitivity and of transmissions that ended
+        self.reach = []
+        self.interferers = []
+        self.lost = 0
+        self.ended = 0
+
+#
+# this function creates a packet (associated with a node)
+# it also sets all parameters, currently random
+# Lpl is the path loss of the link to base station bs, rng the config
+# stream of the node (a node's packets are made one after the other),
+# best its setting for experiments 3 and 5 (see Simulation.bestSettings())
+#
+class myPacket():
+    def __init__(self, sim, nodeid, plen, Lpl, bs, rng=None, best=None):
+        sc = sim.scenario
+        experiment = sc.experiment
+        if rng is None:
+            rng = sim.streams.config(nodeid)
+        info = sim.info
+
+        # base station ID
+        self.bs = bs
+        self.nodeid = nodeid
+        self.txpow = sc.Ptx
+
+        # randomize configuration values
+        self.sf = rng.randint(6,12)
+        self.cr = rng.randint(1,4)
+        self.bw = rng.choice([125, 250, 500])
+
+        # for certain experiments override these
+        if experiment==1 or experiment == 0:
+            self.sf = 12
+            self.cr = 4
+            self.bw = 125
+
+        # for certain experiments override these
+        if experiment==2:
+            self.sf = 6
+            self.cr = 1
+            self.bw = 500
+        # lorawan
+        if experiment == 4:
+            self.sf = 12
+            self.cr = 1
+            self.bw = 125
+
+        if (info):
+            log.info("Lpl: %s", Lpl)
+        Prx = self.txpow - sc.GL - Lpl
+
+        # for experiment 3 find the best setting
+        reach = True
+        if (experiment == 3) or (experiment == 5):
+            # shortest airtime among the settings that reach the base station
+            minsf, minbw, minairtime, minsensi, mintxpow = best
+            if (minsf == 0):
+                sim.unreachable(self)
+                # keep the slowest setting, the packet will be lost
+                reach = False
+                minsf, minbw = 12, 125
+            if (info):
+                log.info("best sf: %s best bw: %s best airtime: %s", minsf, minbw, minairtime)
+            self.sf = minsf
+            self.bw = minbw
+            self.cr = 1
+
+            if experiment == 5 and reach:
+                # reduce the txpower if there's room left
+                self.txpow = mintxpow
+                Prx = self.txpow - sc.GL - Lpl
+                if (info):
+                    log.info("minsesi %s best txpow %s", minsensi, self.txpow)
+
+        # transmission range, needs update XXX
+        self.transRange = 150
+        self.pl = plen
+        self.symTime = (2.0**self.sf)/self.bw
+        self.arriveTime = 0
+        self.rssi = Prx
+        # frequencies: lower bound + number of 61 Hz steps
+        self.freq = 860000000 + rng.randint(0,2622950)
+
+        # for certain experiments override these and
+        # choose some random frequences
+        if experiment == 1:
+            self.freq = rng.choice([860000000, 864000000, 868000000])
+        else:
+            self.freq = 860000000
+
+        self.rectime = airtime(self.sf,self.cr,self.pl,self.bw)
+        if (info):
+            log.info("node %s bs %s sf %s bw %s cr %s rssi %s rectime %s",
+                     self.nodeid, self.bs, self.sf, self.bw, self.cr, self.rssi, self.rectime)
+        # denote if packet is collided
+        self.collided = 0
+        self.processed = 0
+        self.addTime = 0
+        self.seqNr = 0
+        # a received packet counts for its base station (it belongs to the
+        # network of the node)
+        self.delivered = True
+        # mark the packet as lost when it's rssi is below the sensitivity
+        self.lost = (not reach) or sim.isLost(self)
+
+#
+# the "virtual" packet of link k of a node with more base stations, it
+# takes its settings from the link arrays of the simulation (see
+# MultiBSSimulation.linkSettings())
+#
+class myLink():
+    def __init__(self, k, nodeid, bs, txpow, sf, cr, bw, freq, rssi, rectime, lost, delivered):
+        self.link = k
+        self.nodeid = nodeid
+        self.bs = bs
+        self.txpow = txpow
+        self.sf = sf
+        self.cr = cr
+        self.bw = bw
+        self.freq = freq
+        self.rssi = rssi
+        self.rectime = rectime
+        self.lost = lost
+        self.delivered = delivered
+        self.collided = 0
+        self.processed = 0
+        self.addTime = 0
+        self.seqNr = 0
+
+#
+# one base station, nodes in a disc around it (loraDir.py)
+#
+class Simulation():
+    # more than one base station, see loraTrace.py
+    multiBS = False
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.built = False
+
+    #
+    # new topology and state for a run; with topology (another built
+    # simulation, e.g. of another experiment) its base stations and nodes
+    # are taken over instead of placing new ones
+    #
+    def build(self, topology=None):
+        sc = self.scenario
+        start = time.time()
+        # draw a seed if there is none, so every run can be repeated
+        self.seed = sc.seed
+        if self.seed is None:
+            self.seed = random.SystemRandom().randint(0, 2**32 - 1)
+        self.streams = loraRandom.Streams(self.seed)
+        # which messages to log
+        level = loraLog.level(sc.verbose)
+        self.info = level <= logging.INFO
+        self.error = level <= logging.ERROR
+        self.debug = level <= logging.DEBUG
+        self.events = 0
+        self.checks = 0
+        self.comparisons = 0
+        self.timingChecks = 0
+        self.powerChecks = 0
+        self.recorder = None
+        if sc.engine == "heap":
+            self.env = loraEvents.EventHeap()
+        else:
+            self.env = simpy.Environment()
+        self.sensi = sensi
+        self.nodes = []
+        self.bs = []
+        # packets at the BS indexed by sf and frequency
+        self.activeTx = CollisionIndex()
+
+        self.minsensi = self.minSensitivity()
+        Lpl = sc.Ptx - self.minsensi
+        self.maxDist = sc.d0*(math.e**((Lpl-sc.Lpld0)/(10.0*sc.gamma)))
+        if (self.info):
+            log.info("amin %s Lpl %s maxDist: %s", self.minsensi, Lpl, self.maxDist)
+
+        self.reset()
+        t = time.time()
+        if topology is None:
+            self.placeBaseStations()
+            self.placeNodes()
+        else:
+            self.copyTopology(topology)
+        # receivers of the base stations
+        self.gateways = [Gateway(b.id, sc.maxBSReceives) for b in self.bs]
+        self.phaseTime = {"placement": time.time() - t}
+        t = time.time()
+        self.configure()
+        self.phaseTime["configuration"] = time.time() - t
+        self.metrics = Metrics(len(self.bs), len(self.nodes), sc.trace)
+        self.built = True
+        self.buildTime = time.time() - start
+
+    #
+    # figure out the minimal sensitivity for the given experiment
+    #
+    def minSensitivity(self):
+        experiment = self.scenario.experiment
+        if experiment in [0,1,4]:
+            return sensi[5,2]  # 5th row is SF12, 2nd column is BW125
+        elif experiment == 2:
+            return -112.0   # no experiments, so value from datasheet
+        elif experiment in [3,5]:
+            return np.amin(sensi) ## Experiment 3 can use any setting, so take minimum
+        return -200.0
+
+    def reset(self):
+        # global value of packet sequence numbers
+        self.packetSeq = 0
+
+    def placeBaseStations(self):
+        # base station placement
+        self.bsx = self.maxDist+10
+        self.bsy = self.maxDist+10
+        self.xmax = self.bsx + self.maxDist + 20
+        self.ymax = self.bsy + self.maxDist + 20
+        self.bs = [myBS(0, self.bsx, self.bsy)]
+
+    #
+    # base stations and nodes at the positions of those of topology, the
+    # nodes get the settings of this scenario
+    #
+    def copyTopology(self, topology):
+        sc = self.scenario
+        for name in ["bsx", "bsy", "xmax", "ymax", "maxX", "maxY"]:
+            if hasattr(topology, name):
+                setattr(self, name, getattr(topology, name))
+        self.bs = [myBS(b.id, b.x, b.y) for b in topology.bs]
+        for node in topology.nodes:
+            bs = self.bs[node.bs.id] if node.bs is not None else None
+            self.nodes.append(myNode(node.nodeid, bs, sc.avgSendTime, node.x, node.y))
+
+    # minimum distance between two nodes, see Scenario.minDist
+    def nodeDistance(self):
+        sc = self.scenario
+        if sc.minDist is None:
+            return loraPlacement.minDist
+        return sc.minDist
+
+    # message of a placement that gave up at node i (None: all at once)
+    def placementError(self, i, minDist):
+        sc = self.scenario
+        what = "all {} nodes".format(sc.nrNodes) if i is None else \
+            "node {} of {}".format(i, sc.nrNodes)
+        return "could not place {} at least {} m apart within {:.0f} m of the base station, " \
+               "use a smaller minDist (loraDir.py --mindist, 0 disables it)".format(
+                   what, minDist, self.maxDist)
+
+    def placeNodes(self):
+        sc = self.scenario
+        b = self.bs[0]
+        minDist = self.nodeDistance()
+        positions = [None] * sc.nrNodes
+        if sc.placement == "bulk":
+            pos = loraPlacement.bulkPlaceDisc(sc.nrNodes, b.x, b.y, self.maxDist, minDist,
+                                              rng=self.streams.nptopology)
+            if pos is None:
+                raise SimulationError(self.placementError(None, minDist))
+            positions = list(zip(pos[0], pos[1]))
+        # positions of the nodes, to keep them minDist apart
+        grid = loraPlacement.NodeGrid(minDist if minDist > 0 else loraPlacement.minDist)
+
+        for i, pos in enumerate(positions):
+            if pos is None:
+                pos = loraPlacement.placeInDisc(grid, b.x, b.y, self.maxDist, minDist,
+                                                rng=self.streams.topology)
+                if pos is None:
+                    raise SimulationError(self.placementError(i + 1, minDist))
+            self.nodes.append(myNode(i, b, sc.avgSendTime, pos[0], pos[1]))
+
+    #
+    # radio settings of the packets of the placed nodes
+    #
+    def configure(self):
+        sc = self.scenario
+        Lpl = []
+        for node in self.nodes:
+            b = node.bs
+            node.dist = np.sqrt((node.x-b.x)*(node.x-b.x)+(node.y-b.y)*(node.y-b.y))
+            if (self.info):
+                log.info("node %s x %s y %s dist: %s", node.nodeid, node.x, node.y, node.dist)
+            # log-shadow
+            Lpl.append(sc.Lpld0 + 10*sc.gamma*math.log10(node.dist/sc.d0))
+        best = [None] * len(self.nodes)
+        if (sc.experiment == 3) or (sc.experiment == 5):
+            best = list(zip(*[a.tolist() for a in self.bestSettings(np.array(Lpl))]))
+        for i, node in enumerate(self.nodes):
+            node.packet = myPacket(self, node.nodeid, sc.packetLength, Lpl[i], node.bs.id,
+                                   best=best[i])
+
+    #
+    # for experiments 3 and 5, the setting with the shortest airtime of the
+    # packets with path loss Lpl (an array), all at once (see
+    # loraAirtime.BestSetting): the arrays sf, bw, airtime, sensitivity and
+    # txpow, sf 0 when the base station can not be reached, txpow reduced
+    # to what is needed for experiment 5
+    #
+    def bestSettings(self, Lpl):
+        sc = self.scenario
+        Prx = sc.Ptx - sc.GL - Lpl
+        sf, bw, at, minsensi = loraAirtime.bestSetting(sensi, 1, sc.packetLength).resolve(Prx)
+        txpow = loraAirtime.reduceTxPow(sc.Ptx, Prx, minsensi).astype(int)
+        return sf, bw, at, minsensi, txpow
+
+    # the base station can not be reached with any setting
+    def unreachable(self, packet):
+        raise SimulationError("does not reach base station")
+
+    # rssi below the sensitivity of the packet's setting
+    def isLost(self, packet):
+        return packet.rssi < sensi[packet.sf - 7, [125,250,500].index(packet.bw) + 1]
+
+    #
+    # time until the next transmission of node, with slotted ALOHA the
+    # transmission waits for the next slot to start
+    #
+    def nextGap(self, node):
+        sc = self.scenario
+        A = next(node.gaps)
+        if sc.aloha == "slotted":
+            now = self.env.now
+            A = math.ceil((now + A - sc.guardTime) / sc.slotTime) * sc.slotTime + sc.guardTime - now
+        if (self.debug):
+            log.debug("transmission is scheduled at %s", self.env.now + A)
+        return A
+
+    #
+    # mark the collisions of the freshly arrived packet with the packets in
+    # the air that may interfere (others), returns 1 if packet collided
+    #
+    def collide(self, packet, others):
+        sc = self.scenario
+        debug = self.debug
+        col = 0 # flag needed since there might be several collisions for packet
+        timing = 0
+        power = 0
+        for other in others:
+            if other.nodeid != packet.nodeid:
+                if (debug):
+                    log.debug(">> node %s (sf:%s bw:%s freq:%.6e)", other.nodeid, other.sf, other.bw, other.freq)
+                # simple collision
+                if frequencyCollision(packet, other) and sfCollision(packet, other):
+                    if sc.full_collision:
+                        timing = timing + 1
+                        if timingCollision(packet, other, self.env.now):
+                            # check who collides in the power domain
+                            power = power + 1
+                            c = powerCollision(packet, other)
+                            # mark all the collided packets
+                            # either this one, the other one, or both
+                            for p in c:
+                                p.collided = 1
+                                if p == packet:
+                                    col = 1
+                        else:
+                            # no timing collision, all fine
+                            pass
+                    else:
+                        packet.collided = 1
+                        other.collided = 1  # other also got lost, if it wasn't lost already
+                        col = 1
+        self.comparisons = self.comparisons + len(others)
+        self.timingChecks = self.timingChecks + timing
+        self.powerChecks = self.powerChecks + power
+        return col
+
+    #
+    # check for collisions at base station
+    # Note: called before a packet (or rather node) is inserted into the list
+    def checkcollision(self, packet):
+        self.checks = self.checks + 1
+        gw = self.gateways[packet.bs]
+        if gw:
+            if (self.debug):
+                log.debug("CHECK node %s (sf:%s bw:%s freq:%.6e) others: %s", packet.nodeid, packet.sf, packet.bw, packet.freq, len(gw))
+            # only packets on the same sf and a nearby frequency can collide
+            return self.collide(packet, [o.packet for o in self.activeTx.candidates(packet.bs, packet)])
+        return 0
+
+    #
+    # main discrete event loop, runs for each node
+    # a list of packet being processed at the gateway
+    # is maintained
+    #
+    def transmit(self, env, node):
+        while True:
+            yield env.timeout(self.nextGap(node))
+            yield env.timeout(self.startTx(node))
+            self.endTx(node)
+
+    #
+    # the transmission of node starts: packet arrives -> add to base station
+    # returns the time until it ends
+    #
+    def startTx(self, node):
+        now = self.env.now
+        packet = node.packet
+        gw = self.gateways[packet.bs]
+        self.events = self.events + 1
+
+        node.sent = node.sent + 1
+        self.packetSeq = self.packetSeq + 1
+        packet.seqNr = self.packetSeq
+        if (self.recorder):
+            self.recorder.record(node, [packet], packet.seqNr, now)
+        if (node in gw):
+            if (self.error):
+                log.error("packet already in")
+        elif packet.lost:
+            if (self.debug):
+                log.debug("node %s: packet will be lost", node.nodeid)
+        else:
+            # adding packet if no collision
+            if (self.checkcollision(packet)==1):
+                packet.collided = 1
+            else:
+                packet.collided = 0
+            gw.arrive(node, packet, now)
+            if (self.debug and packet.processed == 0):
+                log.debug("too long: %s", len(gw))
+            self.activeTx.add(packet.bs, packet, node)
+            packet.addTime = now
+        return packet.rectime
+
+    #
+    # the transmission of node ends
+    #
+    def endTx(self, node):
+        packet = node.packet
+        gw = self.gateways[packet.bs]
+        self.events = self.events + 1
+
+        m = self.metrics
+        if packet.lost:
+            m.lostPacket(packet)
+        if packet.collided == 1:
+            m.collidedPacket(packet)
+        if packet.collided == 0 and not packet.lost:
+            m.receivedPacket(packet)
+            m.endedTransmission(node, packet.seqNr, 1, packet.bs)
+        else:
+            m.endedTransmission(node, packet.seqNr, 0, None)
+        if packet.processed == 1:
+            m.processed = m.processed + 1
+
+        # complete packet has been received by base station
+        # can remove it
+        if (node in gw):
+            gw.leave(node, self.env.now)
+            self.activeTx.remove(packet.bs, packet, node)
+        # reset the packet
+        packet.collided = 0
+        packet.processed = 0
+
+    #
+    # run the simulation, on a new topology unless build() was called
+    #
+    def run(self):
+        if not self.built:
+            self.build()
+        self.built = False
+        start = time.time()
+        self.simulate()
+        self.runTime = time.time() - start
+        self.phaseTime["run"] = self.runTime
+        start = time.time()
+        res = self.results()
+        res.phaseTime["reporting"] = time.time() - start
+        return res
+
+    def simulate(self):
+        sc = self.scenario
+        if sc.engine in ["batch", "slots"]:
+            if sc.traceFile:
+                raise SimulationError("the {} engine does not write a trace".format(sc.engine))
+            slot = sc.slotTime if sc.aloha == "slotted" else None
+            if sc.engine == "batch":
+                res = loraBatch.run(self.nodes, sc.simtime, sensi, sc.maxBSReceives, sc.full_collision,
+                                    slot, self.streams.traffic, sc.guardTime)
+            elif slot is None:
+                raise SimulationError("the slots engine needs slotted ALOHA")
+            else:
+                res = loraSlots.run(self.nodes, self.streams, sc.simtime, sensi, sc.maxBSReceives,
+                                    sc.full_collision, slot, sc.guardTime)
+            for i, node in enumerate(self.nodes):
+                node.sent = int(res.sent[i])
+            # only the totals, not per spreading factor or node
+            m = self.metrics
+            m.collided = m.collidedPerBS[0] = res.nrCollisions
+            m.received = m.receivedPerBS[0] = res.nrReceived
+            m.lost = m.lostPerBS[0] = res.nrLost
+            m.processed = res.nrProcessed
+            # every packet starts once and ends as lost, collided or received
+            self.events = int(res.sent.sum()) + m.lost + m.collided + m.received
+            return
+        self.runEvents()
+
+    # drive startTx and endTx of all nodes until simtime
+    def runEvents(self):
+        sc = self.scenario
+        for node in self.nodes:
+            node.gaps = self.streams.gaps(node.nodeid, node.period)
+        if sc.traceFile:
+            self.recorder = loraTrace.Writer(sc.traceFile, self)
+        try:
+            if sc.engine == "heap":
+                self.env.run(self, self.nodes, sc.simtime)
+                return
+            for node in self.nodes:
+                self.env.process(self.transmit(self.env,node))
+            self.env.run(until=sc.simtime)
+        finally:
+            if (self.recorder):
+                self.recorder.close()
+                self.recorder = None
+
+    # packets of node that are sent with its transmit power
+    def txPackets(self, node):
+        return [node.packet]
+
+    def results(self):
+        res = Results(self.scenario)
+        res.seed = self.seed
+        res.phaseTime = dict(self.phaseTime)
+        res.events = self.events
+        res.checks = self.checks
+        res.comparisons = self.comparisons
+        res.timingChecks = self.timingChecks
+        res.powerChecks = self.powerChecks
+        res.buildTime = self.buildTime
+        res.runTime = self.runTime
+        res.sent = sum(n.sent for n in self.nodes)
+        m = self.metrics
+        res.nrCollisions = m.collided
+        res.nrReceived = m.received
+        res.nrProcessed = m.processed
+        res.nrLost = m.lost
+        res.receivedPerBS = list(m.receivedPerBS)
+        if self.scenario.engine not in ["batch", "slots"]:
+            res.receivedPerSF = list(m.receivedPerSF)
+            res.collidedPerSF = list(m.collidedPerSF)
+            res.lostPerSF = list(m.lostPerSF)
+            res.receivedPerNode = m.receivedPerNode
+            res.diversity = list(m.diversity)
+            res.bestPerBS = list(m.bestPerBS)
+            res.pathOccupancy = [gw.occupancy(self.env.now) for gw in self.gateways]
+            res.peakInFlight = [self.activeTx.peak.get(gw.id, 0) for gw in self.gateways]
+            res.peakReceiving = [gw.peak for gw in self.gateways]
+        # compute energy
+        res.energy = sum(p.rectime * TX[int(p.txpow)+2] * V * node.sent
+                         for node in self.nodes for p in self.txPackets(node)) / 1e6
+        if res.sent:
+            # data extraction rate
+            res.der = (res.sent-res.nrCollisions)/float(res.sent)
+            res.der2 = (res.nrReceived)/float(res.sent)
+        return res
+
+#
+# nrBS base stations, nodes spread over a rectangle (loraDirMulBS.py)
+#
+class MultiBSSimulation(Simulation):
+    multiBS = True
+
+    def placeBaseStations(self):
+        sc = self.scenario
+        maxDist = self.maxDist
+        if sc.layout != "fixed":
+            # each base station covers about one cell of the layout
+            spacing = sc.baseDist if sc.baseDist > 0 else loraLayout.spacing(sc.layout, maxDist)
+            self.layoutBaseStations(spacing, spacing / 2.0)
+            return
+        self.bsx = maxDist+10
+        self.bsy = maxDist+10
+        self.xmax = self.bsx + maxDist + 20
+        self.ymax = self.bsy + maxDist + 20
+        self.maxX = 2 * maxDist * math.sin(60*(math.pi/180)) # == sqrt(3) * maxDist
+        self.maxY = 2 * maxDist * math.sin(30*(math.pi/180)) # == maxdist
+        self.bs = []
+        for i in range(0,sc.nrBS):
+            x, y = self.bsPosition(i)
+            self.bs.append(myBS(i, x, y))
+
+    # This is a hack for now
+    def bsPosition(self, id):
+        nrBS = self.scenario.nrBS
+        maxX = self.maxX
+        maxY = self.maxY
+        if (nrBS == 1):
+            return maxX/2.0, maxY/2.0
+        if (nrBS == 3 or nrBS == 2):
+            return (id+1)*maxX/float(nrBS+1), maxY/2.0
+        if (nrBS == 4):
+            if (id < 2):
+                return (id+1)*maxX/3.0, maxY/3.0
+            return (id+1-2)*maxX/3.0, 2*maxY/3.0
+        if (nrBS == 6):
+            if (id < 3):
+                return (id+1)*maxX/4.0, maxY/3.0
+            return (id+1-3)*maxX/4.0, 2*maxY/3.0
+        if (nrBS == 8):
+            if (id < 4):
+                return (id+1)*maxX/5.0, maxY/3.0
+            return (id+1-4)*maxX/5.0, 2*maxY/3.0
+        if (nrBS == 24):
+            if (id < 8):
+                return (id+1)*maxX/9.0, maxY/4.0
+            elif (id < 16):
+                return (id+1-8)*maxX/9.0, 2*maxY/4.0
+            return (id+1-16)*maxX/9.0, 3*maxY/4.0
+        raise SimulationError("no fixed layout for {} base stations, use 1, 2, 3, 4, 6, 8 or 24, "
+                              "or the hex or grid layout".format(nrBS))
+
+    #
+    # base stations of a generated or loaded layout (see loraLayout.py), the
+    # area is the box around them grown by margin on every side
+    #
+    def layoutBaseStations(self, spacing, margin):
+        sc = self.scenario
+        try:
+            x, y = loraLayout.positions(sc.layout, sc.nrBS, spacing)
+        except (IOError, ValueError) as e:
+            raise SimulationError("layout {}: {}".format(sc.layout, e))
+        x = x - np.min(x) + margin
+        y = y - np.min(y) + margin
+        self.maxX = float(np.max(x)) + margin
+        self.maxY = float(np.max(y)) + margin
+        self.xmax = self.maxX + 20
+        self.ymax = self.maxY + 20
+        self.bs = []
+        for i in range(0,sc.nrBS):
+            self.bs.append(myBS(i, float(x[i]), float(y[i])))
+
+    #
+    # the nodes are spread over the whole area, the scripts have always put
+    # any number of them in it: no minimum distance unless it is given
+    #
+    def nodeDistance(self):
+        sc = self.scenario
+        if sc.minDist is None:
+            return 0
+        return sc.minDist
+
+    def placeNodes(self):
+        sc = self.scenario
+        minDist = self.nodeDistance()
+        # positions of the nodes, to keep them minDist apart
+        grid = loraPlacement.NodeGrid(minDist if minDist > 0 else loraPlacement.minDist)
+        x = np.zeros(sc.nrNodes)
+        y = np.zeros(sc.nrNodes)
+        for i in range(0,sc.nrNodes):
+            pos = loraPlacement.placeInRect(grid, self.maxX, self.maxY, minDist,
+                                            rng=self.streams.topology)
+            if pos is None:
+                raise SimulationError("could not place node {} of {} at least {} m apart in the "
+                                      "{:.0f} x {:.0f} m area, use a smaller minDist (0 disables "
+                                      "it)".format(i + 1, sc.nrNodes, minDist, self.maxX, self.maxY))
+            x[i], y[i] = pos
+        for i in range(0,sc.nrNodes):
+            self.nodes.append(myNode(i, None, sc.avgSendTime, x[i], y[i]))
+
+    #
+    # links of every node to the base stations: their settings are arrays
+    # with one element per link, only the links that take part in the
+    # collisions (see interferers()) get a packet object
+    #
+    def configure(self):
+        self.linkBudget(np.array([node.x for node in self.nodes]),
+                        np.array([node.y for node in self.nodes]))
+        self.linkSettings()
+        self.inAir = ~self.linkLost | self.interferers()
+        self.addLinks()
+
+    # "all" or "range", see linkBudget()
+    def linkMode(self):
+        sc = self.scenario
+        if sc.links is None:
+            return "all" if sc.layout == "fixed" else "range"
+        if sc.links not in ["all", "range"]:
+            raise SimulationError("unknown links '{}', use all or range".format(sc.links))
+        return sc.links
+
+    # largest and smallest antenna gain of a link
+    def maxGain(self):
+        return 0.0
+
+    def minGain(self):
+        return 0.0
+
+    #
+    # distance within which a packet can still be received or interfere with
+    # the full collision check: its rssi, with the largest antenna gain, is
+    # at least powerThreshold below the weakest packet that reaches a base
+    # station (the sensitivity, with the smallest antenna gain); from the
+    # path loss model itself (maxDist is smaller)
+    #
+    def linkRange(self):
+        sc = self.scenario
+        weakest = self.minsensi + min(0.0, self.minGain())
+        Lpl = sc.Ptx - sc.GL - (weakest - powerThreshold) + self.maxGain()
+        return sc.d0 * 10**((Lpl - sc.Lpld0)/(10.0*sc.gamma))
+
+    #
+    # base stations, distance and path loss (log-shadow) of the links of
+    # every node, in the order of the node ids: node i has a link to the
+    # base stations self.links[i], its links are firstLink[i] up to
+    # firstLink[i+1] of the link arrays linkNode and linkBS (node and base
+    # station), dist and pathLoss.
+    # With links "all" every node has a link to every base station, the
+    # arrays are the rows of a matrix with one row per node. With
+    # "range" a node only has links to the base stations within
+    # linkRange(), found with a GatewayIndex (see loraLayout.py); packets
+    # further away never count, not even as lost, and do not interfere (also
+    # not with the simple collision check). A node out of range of all base
+    # stations keeps a link to the closest one.
+    #
+    def linkBudget(self, x, y):
+        sc = self.scenario
+        bx = np.array([b.x for b in self.bs])
+        by = np.array([b.y for b in self.bs])
+        if self.linkMode() == "all":
+            self.links = [np.arange(len(self.bs))] * len(x)
+        else:
+            index = loraLayout.GatewayIndex(bx, by, self.linkRange())
+            self.links = []
+            for i in range(0, len(x)):
+                near = index.near(x[i], y[i])
+                if len(near) == 0:
+                    near = np.array([index.nearest(x[i], y[i])])
+                self.links.append(near)
+        # all links as (node, base station) pairs
+        counts = [len(near) for near in self.links]
+        self.firstLink = np.concatenate(([0], np.cumsum(counts))).astype(int)
+        self.linkNode = np.repeat(np.arange(len(self.links)), counts)
+        self.linkBS = np.concatenate(self.links).astype(int)
+        dx = x[self.linkNode] - bx[self.linkBS]
+        dy = y[self.linkNode] - by[self.linkBS]
+        self.dist = np.sqrt(dx*dx + dy*dy)
+        self.pathLoss = sc.Lpld0 + 10*sc.gamma*np.log10(self.dist/sc.d0)
+
+    #
+    # settings of all links at once, as myPacket sets them for one packet:
+    # the arrays linkTxpow, linkSF, linkCR, linkBW, linkFreq, linkRSSI,
+    # linkRectime and linkLost (below the sensitivity, or no setting reaches
+    # the base station), and linkDelivered (the packet counts at the base
+    # station)
+    #
+    def linkSettings(self):
+        sc = self.scenario
+        experiment = sc.experiment
+        n = len(self.linkNode)
+        Lpl = self.pathLoss
+        txpow = np.full(n, sc.Ptx, dtype=int)
+        reach = np.ones(n, dtype=bool)
+        sf, cr, bw, freq = self.linkDraws()
+        if experiment == 1 or experiment == 0:
+            sf[:], cr[:], bw[:] = 12, 4, 125
+        if experiment == 2:
+            sf[:], cr[:], bw[:] = 6, 1, 500
+        if experiment == 4:
+            sf[:], cr[:], bw[:] = 12, 1, 125
+        if (experiment == 3) or (experiment == 5):
+            sf[:], bw[:], minairtime, minsensi, reduced = self.bestSettings(Lpl)
+            cr[:] = 1
+            # links out of reach are kept with the slowest setting, but lost
+            reach = sf > 0
+            sf[~reach] = 12
+            bw[~reach] = 125
+            if (self.info):
+                for k in np.nonzero(~reach)[0]:
+                    log.info("node %s does not reach base station %s", self.linkNode[k],
+                             self.linkBS[k])
+            if experiment == 5:
+                # reduce the txpower if there's room left
+                txpow[reach] = reduced[reach]
+        self.linkTxpow = txpow
+        self.linkSF = sf
+        self.linkCR = cr
+        self.linkBW = bw
+        self.linkFreq = freq
+        self.linkRSSI = txpow - sc.GL - Lpl
+        self.linkRectime = loraAirtime.airtimeOf(sf, cr, sc.packetLength, bw)
+        # mark the packet as lost when it's rssi is below the sensitivity
+        self.linkLost = ~reach | (self.linkRSSI < self.minsensi)
+        self.linkDelivered = np.ones(n, dtype=bool)
+
+    #
+    # random sf, cr, bw and frequency of every link, drawn from the config
+    # stream of its node in the order of myPacket; only experiment 1 (the
+    # frequency) and experiments above 5 (the rest) use them, the others
+    # skip the draws
+    #
+    def linkDraws(self):
+        sc = self.scenario
+        n = len(self.linkNode)
+        sf = np.zeros(n, dtype=int)
+        cr = np.zeros(n, dtype=int)
+        bw = np.zeros(n, dtype=int)
+        freq = np.full(n, 860000000, dtype=np.int64)
+        if sc.experiment in [0, 2, 3, 4, 5]:
+            return sf, cr, bw, freq
+        for node in self.nodes:
+            rng = self.streams.config(node.nodeid)
+            for k in range(self.firstLink[node.nodeid], self.firstLink[node.nodeid+1]):
+                sf[k] = rng.randint(6,12)
+                cr[k] = rng.randint(1,4)
+                bw[k] = rng.choice([125, 250, 500])
+                # drawn and overridden by myPacket
+                rng.randint(0,2622950)
+                if sc.experiment == 1:
+                    freq[k] = rng.choice([860000000, 864000000, 868000000])
+        return sf, cr, bw, freq
+
+    #
+    # "virtual" packets of the nodes, for their links that take part in the
+    # collisions (inAir, and the first link of a node, whose airtime and
+    # power are those of the transmission); only the packets that reach
+    # their BS are checked for collisions and counted when they end, the
+    # others are counted as lost at the end of the run
+    #
+    def addLinks(self):
+        lostPerNode = np.bincount(self.linkNode[self.linkLost], minlength=len(self.nodes))
+        for node in self.nodes:
+            node.dist = self.dist[self.firstLink[node.nodeid]:self.firstLink[node.nodeid+1]]
+            node.packet = []
+            node.reach = []
+            node.interferers = []
+            node.lost = int(lostPerNode[node.nodeid])
+        take = self.inAir.copy()
+        take[self.firstLink[:-1]] = True
+        take = np.nonzero(take)[0]
+        # lists rather than array elements, one link at a time
+        columns = [a[take].tolist() for a in [self.linkNode, self.linkBS, self.linkTxpow,
+                   self.linkSF, self.linkCR, self.linkBW, self.linkFreq, self.linkRSSI,
+                   self.linkRectime, self.linkLost, self.linkDelivered, self.inAir]]
+        for k, nodeid, bs, txpow, sf, cr, bw, freq, rssi, rectime, lost, delivered, inAir in \
+                zip(take.tolist(), *columns):
+            p = myLink(k, nodeid, bs, txpow, sf, cr, bw, freq, rssi, rectime, lost, delivered)
+            node = self.nodes[nodeid]
+            node.packet.append(p)
+            if not lost:
+                node.reach.append(p)
+            elif inAir:
+                node.interferers.append(p)
+        if (self.info):
+            for node in self.nodes:
+                log.info("node %s x %s y %s dist: %s", node.nodeid, node.x, node.y, node.dist)
+
+    #
+    # rssi of the weakest packet that reaches each base station, at most the
+    # sensitivity; an antenna gain below 0 dB can take a packet that reaches
+    # its BS below the sensitivity
+    #
+    def weakestReach(self):
+        weakest = np.full(len(self.bs), float(self.minsensi))
+        reach = ~self.linkLost
+        np.minimum.at(weakest, self.linkBS[reach], self.linkRSSI[reach])
+        return weakest
+
+    #
+    # the lost links that are put in the air at their BS, as long as they
+    # may collide with a packet that reaches it: with the full collision
+    # check a packet powerThreshold below the weakest packet that reaches
+    # the BS (see weakestReach()) never survives the capture of a packet
+    # above it and is left out altogether.
+    #
+    def interferers(self):
+        sc = self.scenario
+        if sc.full_collision:
+            weakest = self.weakestReach()
+            return self.linkLost & (self.linkRSSI > weakest[self.linkBS] - powerThreshold)
+        return self.linkLost.copy()
+
+    #
+    # check for collisions at base station
+    # Note: called before a packet (or rather node) is inserted into the list
+    def checkcollision(self, packet):
+        self.checks = self.checks + 1
+        # lost packets don't collide
+        if packet.lost:
+            return 0
+        # only packets on the same sf and a nearby frequency can collide,
+        # the lost packets in the air at the BS included
+        return self.collide(packet, self.activeTx.candidates(packet.bs, packet))
+
+    #
+    # the transmission of node starts, a "virtual" packet arrives at every
+    # gateway it reaches, returns the time until it ends
+    #
+    def startTx(self, node):
+        now = self.env.now
+        self.events = self.events + 1
+
+        node.sent = node.sent + 1
+        self.packetSeq = self.packetSeq + 1
+        node.seqNr = self.packetSeq
+        if (self.recorder):
+            self.recorder.recordLinks(self, node, node.seqNr, now)
+
+        for packet in node.reach:
+            gw = self.gateways[packet.bs]
+            if (node in gw):
+                if (self.error):
+                    log.error("packet already in")
+            else:
+                # adding packet if no collision
+                if (self.checkcollision(packet)==1):
+                    packet.collided = 1
+                else:
+                    packet.collided = 0
+                gw.arrive(node, packet, now)
+                self.activeTx.add(packet.bs, packet, packet)
+                packet.addTime = now
+                packet.seqNr = node.seqNr
+        # lost packets interfere, but are not demodulated
+        for packet in node.interferers:
+            self.activeTx.add(packet.bs, packet, packet)
+            packet.addTime = now
+
+        # take first packet rectime
+        return node.packet[0].rectime
+
+    #
+    # the transmission of node ends at all gateways
+    #
+    def endTx(self, node):
+        now = self.env.now
+        m = self.metrics
+        self.events = self.events + 1
+
+        # if packet did not collide and got a demodulator path, it is
+        # received at that BS, the lost packets are counted at the end
+        node.ended = node.ended + 1
+        gateways = 0
+        best = None
+        delivered = False
+        for packet in node.reach:
+            if packet.processed == 1:
+                m.processed = m.processed + 1
+            if packet.collided == 1:
+                m.collidedPacket(packet)
+            elif packet.processed == 1:
+                m.receivedPacket(packet, packet.delivered)
+                gateways = gateways + 1
+                if best is None or packet.rssi > best.rssi:
+                    best = packet
+                delivered = delivered or packet.delivered
+            # else all demodulator paths of the BS were busy
+        # a transmission counts once, whichever BS received it (and at the
+        # strongest one), and once for its network
+        m.endedTransmission(node, node.seqNr, gateways, best.bs if best else None)
+        if delivered:
+            m.deliveredTransmission(node)
+        if m.trace:
+            m.lostPackets.extend([node.seqNr] * node.lost)
+
+        # complete packet has been received by base station
+        # can remove it
+        for packet in node.reach:
+            if (node in self.gateways[packet.bs]):
+                self.gateways[packet.bs].leave(node, now)
+                self.activeTx.remove(packet.bs, packet, packet)
+                # reset the packet
+                packet.collided = 0
+                packet.processed = 0
+        for packet in node.interferers:
+            self.activeTx.remove(packet.bs, packet, packet)
+            packet.collided = 0
+
+    def simulate(self):
+        sc = self.scenario
+        if sc.engine in ["batch", "slots"]:
+            raise SimulationError("the {} engine only supports one base station".format(sc.engine))
+        self.runEvents()
+        # the lost links of all transmissions that ended
+        ended = np.array([node.ended for node in self.nodes], dtype=np.int64)
+        lost = self.linkLost
+        self.metrics.lostLinks(self.linkBS[lost], self.linkSF[lost], ended[self.linkNode[lost]])
+
+    # the node sends once, with the power of the link to its first BS
+    def txPackets(self, node):
+        return node.packet[:1]
+
+    def results(self):
+        res = Simulation.results(self)
+        res.sent = self.packetSeq
+        res.der = float("nan")
+        res.der2 = float("nan")
+        if res.sent:
+            # data extraction rate
+            res.der = res.nrReceived/float(res.sent)
+        return res
+
+#
+# nrNodes nodes in a disc around each of the nrBS base stations, which are
+# baseDist apart (directionalLoraIntf.py)
+#
+class DirectionalSimulation(MultiBSSimulation):
+    def placeBaseStations(self):
+        sc = self.scenario
+        maxDist = self.maxDist
+        if sc.layout != "fixed":
+            # the discs of the nodes lie within the area
+            spacing = sc.baseDist if sc.baseDist > 0 else loraLayout.spacing(sc.layout, maxDist)
+            self.layoutBaseStations(spacing, maxDist)
+            return
+        # size of area
+        self.xmax = maxDist*(sc.nrBS+2) + 20
+        self.ymax = maxDist*(sc.nrBS+1) + 20
+        self.maxX = maxDist + sc.baseDist*(sc.nrBS)
+        self.maxY = 2 * maxDist * math.sin(30*(math.pi/180)) # == maxdist
+        self.bs = []
+        for i in range(0,sc.nrBS):
+            x, y = self.bsPosition(i)
+            self.bs.append(myBS(i, x, y))
+
+    # This is a hack for now
+    def bsPosition(self, id):
+        nrBS = self.scenario.nrBS
+        baseDist = self.scenario.baseDist
+        maxDist = self.maxDist
+        maxX = self.maxX
+        maxY = self.maxY
+        if (nrBS == 1 or nrBS == 2):
+            return maxDist + id*baseDist, maxY
+        if (nrBS == 3):
+            return [(maxDist + baseDist, maxY), (maxDist, maxY),
+                    (maxDist + 2*baseDist, maxY)][id]
+        if (nrBS == 4):
+            return [(maxDist + baseDist, maxY), (maxDist, maxY),
+                    (maxDist + 2*baseDist, maxY), (maxDist + baseDist, maxY + baseDist)][id]
+        if (nrBS == 5):
+            return [(maxDist + baseDist, maxY + baseDist), (maxDist, maxY + baseDist),
+                    (maxDist + 2*baseDist, maxY + baseDist), (maxDist + baseDist, maxY),
+                    (maxDist + baseDist, maxY + 2*baseDist)][id]
+        if (nrBS == 6):
+            if (id < 3):
+                return (id+1)*maxX/4.0, maxY/3.0
+            return (id+1-3)*maxX/4.0, 2*maxY/3.0
+        if (nrBS == 8):
+            if (id < 4):
+                return (id+1)*maxX/5.0, maxY/3.0
+            return (id+1-4)*maxX/5.0, 2*maxY/3.0
+        if (nrBS == 24):
+            if (id < 8):
+                return (id+1)*maxX/9.0, maxY/4.0
+            elif (id < 16):
+                return (id+1-8)*maxX/9.0, 2*maxY/4.0
+            return (id+1-16)*maxX/9.0, 3*maxY/4.0
+        if (nrBS == 96):
+            row = id // 24
+            return (id+1-24*row)*maxX/25.0, (row+1)*maxY/5.0
+        raise SimulationError("no fixed layout for {} base stations, use 1-6, 8, 24 or 96, "
+                              "or the hex or grid layout".format(nrBS))
+
+    def placeNodes(self):
+        sc = self.scenario
+        # positions of the nodes of each base station, in a disc around it
+        # nodes can be placed everywhere, there is no minimum distance,
+        # otherwise there is a risk that little nodes are placed
+        # between the base stations where it would be more crowded
+        positions = []
+        for b in self.bs:
+            positions.append(loraPlacement.bulkPlaceDisc(sc.nrNodes, b.x, b.y, self.maxDist, 0,
+                                                         rng=self.streams.nptopology))
+        # node i*nrBS+j is node i of base station j
+        x = np.array([pos[0] for pos in positions]).T.ravel()
+        y = np.array([pos[1] for pos in positions]).T.ravel()
+        for i in range(0,sc.nrNodes):
+            for j, b in enumerate(self.bs):
+                # create nrNodes for each base station
+                k = i*sc.nrBS+j
+                self.nodes.append(myNode(k, b, sc.avgSendTime, x[k], y[k]))
+
+    def maxGain(self):
+        sc = self.scenario
+        if (sc.directionality == 1):
+            return max(0.0, loraAntenna.maxGain(loraAntenna.pattern(sc.antenna)))
+        return 0.0
+
+    def minGain(self):
+        sc = self.scenario
+        if (sc.directionality == 1):
+            return min(0.0, loraAntenna.minGain(loraAntenna.pattern(sc.antenna)))
+        return 0.0
+
+    # also the antenna gain of every link, in the link arrays
+    def linkBudget(self, x, y):
+        sc = self.scenario
+        MultiBSSimulation.linkBudget(self, x, y)
+        if (sc.directionality == 1):
+            pat = loraAntenna.pattern(sc.antenna)
+            own = np.array([node.bs.id for node in self.nodes])
+            bx = np.array([b.x for b in self.bs])
+            by = np.array([b.y for b in self.bs])
+            if self.linkMode() == "all":
+                self.gain = loraAntenna.gains(pat, x, y, own, bx, by).ravel()
+                return
+            node = self.linkNode
+            bs = self.linkBS
+            self.gain = loraAntenna.linkGains(pat, x[node], y[node], bx[own[node]], by[own[node]],
+                                              bx[bs], by[bs], bs == own[node])
+
+    #
+    # networks of the base stations and nodes, before their links: base
+    # station b belongs to network b % nrNetworks, every node to the network
+    # of its own base station
+    #
+    def configure(self):
+        sc = self.scenario
+        if sc.nrNetworks < 1:
+            raise SimulationError("nrNetworks must be at least 1")
+        self.bsNetwork = np.arange(len(self.bs)) % sc.nrNetworks
+        self.nodeNetwork = self.bsNetwork[np.array([node.bs.id for node in self.nodes], dtype=int)]
+        MultiBSSimulation.configure(self)
+
+    def linkSettings(self):
+        MultiBSSimulation.linkSettings(self)
+        # a packet only counts at the base stations of the node's network
+        self.linkDelivered = self.bsNetwork[self.linkBS] == self.nodeNetwork[self.linkNode]
+        # when we add directionality, we update the RSSI here
+        if (self.scenario.directionality == 1):
+            self.updateRSSI()
+
+    # does node have a directional antenna
+    def directional(self, node):
+        return True
+
+    #
+    #   update RSSI depending on direction, with the gains of the links of
+    #   the directional nodes
+    #
+    def updateRSSI(self):
+        directional = np.array([self.directional(node) for node in self.nodes], dtype=bool)
+        links = np.nonzero(directional[self.linkNode])[0]
+        if (self.info):
+            for k in links:
+                log.info("node %s bs %s rssi %s gain %s", self.linkNode[k], self.linkBS[k],
+                         self.linkRSSI[k], self.gain[k])
+        self.linkRSSI[links] = self.linkRSSI[links] + self.gain[links]
+
+    def results(self):
+        sc = self.scenario
+        res = MultiBSSimulation.results(self)
+        nrBS = len(self.bs)
+        own = np.array([node.bs.id for node in self.nodes], dtype=int)
+        sent = np.array([node.sent for node in self.nodes], dtype=np.int64)
+        res.sentPerBS = [int(n) for n in np.bincount(own, weights=sent, minlength=nrBS)]
+        res.derPerBS = [res.receivedPerBS[i]/float(res.sentPerBS[i]) if res.sentPerBS[i]
+                        else float("nan") for i in range(0, nrBS)]
+        res.avgDER = sum(res.derPerBS)/nrBS
+        res.sentPerNetwork = [int(n) for n in
+                              np.bincount(self.nodeNetwork, weights=sent, minlength=sc.nrNetworks)]
+        res.receivedPerNetwork = [int(n) for n in
+                                  np.bincount(self.nodeNetwork, weights=self.metrics.deliveredPerNode,
+                                              minlength=sc.nrNetworks)]
+        res.derPerNetwork = [res.receivedPerNetwork[i]/float(res.sentPerNetwork[i])
+                             if res.sentPerNetwork[i] else float("nan")
+                             for i in range(0, sc.nrNetworks)]
+        return res
+
+#
+# only the nodes of base station 0 are directional (oneDirectionalLoraIntf.py)
+#
+class OneDirectionalSimulation(DirectionalSimulation):
+    def directional(self, node):
+        return node.bs.id == 0
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: slot engine for slotted ALOHA traffic to one base station
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    With slotted ALOHA every transmission starts at the beginning of a slot,
+    guardTime after a multiple of slotTime. All packets of a slot arrive at
+    the same time, so timingCollision() holds between any two of them and,
+    with the frequencies of loraSim.py (MHz apart), two of them interfere
+    exactly when they have the same spreading factor and frequency. A packet
+    then survives the others of its group only if it is powerThreshold
+    above the strongest other packet (powerCollision() is symmetric), and
+    with the simple check only if it is alone. The slot engine sorts the
+    packets of a window on (slot, sf, frequency, rssi) and resolves all its
+    slots in one step from the strongest and second strongest packet of
+    every group, without enumerating the pairs.
+
+    Packets longer than slotTime - guardTime (e.g. SF12 with the default
+    1 s slots) are still in the air when later slots start. Those pairs,
+    and the demodulator paths (maxBSReceives), are resolved as by the batch
+    engine (loraBatch.py).
+
+    The nodes draw their gaps from the same per node streams as the simpy
+    and heap engines (loraRandom.py) and the start times are computed with
+    the same floating point operations, so a run gives the same results as
+    with heap under the same seed. The window boundaries lie half a slot
+    before a slot starts, so no slot is ever split between two windows.
+"""
+
+import numpy as np
+import loraBatch
+from loraRandom import blockSize
+from loraCollision import maxFreqDiff, powerThreshold
+
+# number of transmissions per window, roughly
+windowSize = 1000000
+
+#
+# the gaps of every node, from the blocks of its traffic stream (the key
+# of a node is made when it sends its first packet)
+#
+class Gaps():
+    def __init__(self, streams, nodes):
+        n = len(nodes)
+        self.streams = streams
+        self.nodeid = [node.nodeid for node in nodes]
+        self.period = [float(node.period) for node in nodes]
+        self.key = [None] * n
+        self.buf = np.zeros((n, blockSize))
+        self.block = np.full(n, -1, dtype=np.int64)
+        self.used = np.zeros(n, dtype=np.int64)
+
+    # the next gap of each of the (distinct) nodes with index idx
+    def next(self, idx):
+        g = self.used[idx]
+        b = g // blockSize
+        refill = b != self.block[idx]
+        for i, k in zip(idx[refill], b[refill]):
+            if self.key[i] is None:
+                self.key[i] = self.streams.nodeTraffic(self.nodeid[i])
+            self.buf[i] = self.streams.block(self.key[i], self.period[i], k)
+            self.block[i] = k
+        self.used[idx] = g + 1
+        return self.buf[idx, g % blockSize]
+
+#
+# all transmissions that start before t_end, one packet of every node at a
+# time; every node has one pending start (upcoming) that was scheduled at
+# prev, both are updated in place
+#
+def arrivals(gaps, prev, upcoming, rectime, slot_time, guard_time, t_end):
+    ids = []
+    starts = []
+    prevs = []
+    active = np.nonzero(upcoming < t_end)[0]
+    while len(active):
+        ids.append(active)
+        starts.append(upcoming[active])
+        prevs.append(prev[active])
+        # same as endTx() and nextGap() of loraSim.py
+        end = upcoming[active] + rectime[active]
+        prev[active] = end
+        upcoming[active] = end + (loraBatch.align(end + gaps.next(active), slot_time, guard_time) - end)
+        active = active[upcoming[active] < t_end]
+    if ids:
+        return np.concatenate(ids), np.concatenate(starts), np.concatenate(prevs)
+    return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+
+#
+# mark the packets (from first on) that collide with a packet of the same
+# slot, sf and frequency
+#
+def resolveSlots(slot, sf, freq, rssi, collided, first, full_collision):
+    order = np.lexsort((rssi[first:], freq[first:], sf[first:], slot[first:])) + first
+    n = len(order)
+    if n == 0:
+        return
+    s = slot[order]
+    f = sf[order]
+    q = freq[order]
+    r = rssi[order]
+    newGroup = np.ones(n, dtype=bool)
+    newGroup[1:] = (s[1:] != s[:-1]) | (f[1:] != f[:-1]) | (q[1:] != q[:-1])
+    group = np.cumsum(newGroup) - 1
+    bounds = np.append(np.nonzero(newGroup)[0], n)
+    size = np.diff(bounds)[group]
+    if full_collision:
+        # the strongest packet of every group is last, the second before it
+        last = bounds[1:][group] - 1
+        strongest = r[last]
+        second = r[np.maximum(last - 1, 0)]
+        other = np.where(np.arange(n) == last, second, strongest)
+        hit = (size > 1) & (r - other < powerThreshold)
+    else:
+        hit = size > 1
+    collided[order[hit]] = 1
+
+#
+# run the whole simulation for the given nodes (as created by loraSim.py)
+# drawing the gaps from streams (a loraRandom.Streams)
+#
+def run(nodes, streams, simtime, sensi, maxBSReceives, full_collision, slot_time, guard_time=0):
+    nrNodes = len(nodes)
+    res = loraBatch.BatchResult(nrNodes)
+    period = np.array([float(n.period) for n in nodes])
+    rectime = np.array([n.packet.rectime for n in nodes])
+    sf = np.array([n.packet.sf for n in nodes])
+    bw = np.array([n.packet.bw for n in nodes])
+    freq = np.array([n.packet.freq for n in nodes], dtype=np.float64)
+    rssi = np.array([n.packet.rssi for n in nodes])
+
+    # same sensitivity lookup as startTx()
+    bwcol = np.select([bw == 125, bw == 250], [1, 2], 3)
+    lost = rssi < sensi[sf - 7, bwcol]
+    # with frequencies closer than the widest window, the packets of a slot
+    # are resolved pair by pair too
+    bySlot = bool(np.all(np.diff(np.unique(freq)) > maxFreqDiff))
+
+    # carried over: in the air at the start of the window
+    c_node = np.zeros(0, dtype=np.int64)
+    c_start = np.zeros(0)
+    c_prev = np.zeros(0)
+    c_coll = np.zeros(0, dtype=np.int8)
+    c_proc = np.zeros(0, dtype=np.int8)
+
+    gaps = Gaps(streams, nodes)
+    prev = np.zeros(nrNodes)
+    upcoming = prev + (loraBatch.align(prev + gaps.next(np.arange(nrNodes)), slot_time, guard_time) - prev)
+    rate = np.sum(1.0 / (period + rectime))
+    slots = max(1, int(windowSize / rate // slot_time))
+    t0 = 0.0
+    k = 0
+    while t0 < simtime:
+        # half a slot before the start of slot k
+        k = k + slots
+        t1 = min((k - 0.5) * slot_time + guard_time, simtime)
+        ids, starts, prevs = arrivals(gaps, prev, upcoming, rectime, slot_time, guard_time, t1)
+        res.sent += np.bincount(ids, minlength=nrNodes)
+
+        # lost packets never reach the base station
+        isLost = lost[ids]
+        ends = starts[isLost] + rectime[ids[isLost]]
+        res.nrLost += int(np.count_nonzero(ends < simtime))
+        ids = ids[~isLost]
+        starts = starts[~isLost]
+        prevs = prevs[~isLost]
+
+        # sort on start time, then in the order the starts were scheduled
+        order = np.lexsort((ids, prevs, starts))
+        first = len(c_node)
+        node = np.concatenate((c_node, ids[order]))
+        start = np.concatenate((c_start, starts[order]))
+        prevt = np.concatenate((c_prev, prevs[order]))
+        end = start + rectime[node]
+        collided = np.concatenate((c_coll, np.zeros(len(ids), dtype=np.int8)))
+        processed = np.concatenate((c_proc, np.zeros(len(ids), dtype=np.int8)))
+
+        if len(node) > first:
+            if bySlot:
+                slot = np.round((start - guard_time) / slot_time).astype(np.int64)
+                resolveSlots(slot, sf[node], freq[node], rssi[node], collided, first, full_collision)
+                loraBatch.resolveCollisions(start, end, prevt, sf[node], bw[node], freq[node],
+                                            rssi[node], collided, first, full_collision, slot)
+            else:
+                loraBatch.resolveCollisions(start, end, prevt, sf[node], bw[node], freq[node],
+                                            rssi[node], collided, first, full_collision)
+            loraBatch.resolveProcessing(start, end, prevt, processed, first, maxBSReceives)
+
+        # packets that end in this window can not be hit any more
+        done = end < t1
+        res.nrCollisions += int(np.count_nonzero(collided[done]))
+        res.nrReceived += int(np.count_nonzero(collided[done] == 0))
+        res.nrProcessed += int(np.count_nonzero(processed[done]))
+
+        carry = ~done
+        c_node = node[carry]
+        c_start = start[carry]
+        c_prev = prevt[carry]
+        c_coll = collided[carry]
+        c_proc = processed[carry]
+        t0 = t1
+    return res
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: binary trace of the transmissions of a run, and its evaluator
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ SYNOPSIS:
+   ./loraTrace.py <trace> [--collision <list>] [--threshold <list>]
+                  [--preamble <list>] [--paths <list>] [--chunk <n>]
+ DESCRIPTION:
+    With the traceFile scenario option (loraDir.py --record) the simpy and
+    heap engines write every packet that starts to the trace: one fixed
+    width record (recordType) per packet at a base station, so a
+    transmission to nrBS base stations gives nrBS records with the same
+    seq. The records are in the order the packets started, and written in
+    blocks of bufferSize with NumPy; <trace>.json holds the description of
+    the records, their number and the scenario.
+
+    read() maps a trace into memory (numpy.memmap), evaluate() resolves the
+    collisions and demodulator paths of the trace again in chunks of
+    records, with the pair rules of the batch engine (loraBatch.py):
+    frequencyCollision(), the spreading factor, timingCollision() and
+    powerCollision(). The rules may be changed: the simple or full
+    collision check, the capture threshold of powerCollision(), the
+    preamble length of timingCollision() and maxBSReceives. With the rules
+    of the run, the counters equal those of the run itself. Only the
+    records in the air are held besides the chunk, so a trace of any length
+    is evaluated in bounded memory without drawing the traffic again.
+
+    Lost packets (below the sensitivity) do not take part with one base
+    station. With more base stations they interfere but are not checked
+    when they start, as in MultiBSSimulation; evaluate() counts received
+    packets per base station, not per network.
+
+    trace
+        trace file to evaluate
+    --collision, --threshold, --preamble, --paths
+        comma separated full collision check (0 or 1), capture thresholds
+        in dB, preamble lengths in symbols and demodulator paths; every
+        combination is evaluated (default: the rules of the run)
+    --chunk
+        records per chunk (default chunkSize)
+ OUTPUT
+    One line per combination with sent, collided, received, processed and
+    lost packets and the DER.
+ EXAMPLE
+    > python loraDir.py 1000 100000 0 100000000 1 --record run.trace
+    > python loraTrace.py run.trace --threshold 1,3,6,10 --collision 1
+"""
+
+import json
+import argparse
+import itertools
+import numpy as np
+import loraBatch
+from loraCollision import powerThreshold
+
+# one packet at a base station; end is when the transmission ends (the
+# airtime of the packet at the first base station), airtime the length of
+# the packet itself, prev when the start was scheduled (see loraBatch.inAir())
+recordType = np.dtype([("seq", "<i8"), ("node", "<i4"), ("bs", "<i4"),
+                       ("start", "<f8"), ("end", "<f8"), ("prev", "<f8"),
+                       ("airtime", "<f8"), ("freq", "<f8"), ("rssi", "<f8"),
+                       ("sf", "<i2"), ("bw", "<i2"), ("lost", "u1")])
+
+# records per write
+bufferSize = 65536
+
+# records per chunk of evaluate()
+chunkSize = 4000000
+
+class Writer():
+    def __init__(self, fname, sim):
+        sc = sim.scenario
+        self.fname = fname
+        self.f = open(fname, "wb")
+        self.buf = np.zeros(bufferSize, dtype=recordType)
+        self.n = 0
+        self.count = 0
+        # end of the last transmission of every node
+        self.lastEnd = np.zeros(len(sim.nodes))
+        self.meta = {"format": 1, "records": None, "recordType": recordType.descr,
+                     "nrBS": len(sim.bs), "multiBS": sim.multiBS, "simtime": sc.simtime,
+                     "full_collision": sc.full_collision, "maxBSReceives": sc.maxBSReceives,
+                     "threshold": powerThreshold, "preamble": 8,
+                     "simulation": type(sim).__name__, "seed": sim.seed,
+                     "scenario": sc.params()}
+
+    # the packets (one per base station) of transmission seq of node start now
+    def record(self, node, packets, seq, now):
+        prev = self.lastEnd[node.nodeid]
+        end = now + packets[0].rectime
+        for p in packets:
+            if self.n == bufferSize:
+                self.flush()
+            self.buf[self.n] = (seq, node.nodeid, p.bs, now, end, prev, p.rectime,
+                                p.freq, p.rssi, p.sf, p.bw, p.lost)
+            self.n = self.n + 1
+        self.lastEnd[node.nodeid] = end
+
+    # the links of transmission seq of node start now, with more base
+    # stations: from the link arrays of sim (see MultiBSSimulation.linkSettings())
+    def recordLinks(self, sim, node, seq, now):
+        a = int(sim.firstLink[node.nodeid])
+        b = int(sim.firstLink[node.nodeid+1])
+        if self.n + (b - a) > bufferSize:
+            self.flush()
+        r = self.buf[self.n:self.n + (b - a)]
+        end = now + sim.linkRectime[a]
+        r["seq"] = seq
+        r["node"] = node.nodeid
+        r["bs"] = sim.linkBS[a:b]
+        r["start"] = now
+        r["end"] = end
+        r["prev"] = self.lastEnd[node.nodeid]
+        r["airtime"] = sim.linkRectime[a:b]
+        r["freq"] = sim.linkFreq[a:b]
+        r["rssi"] = sim.linkRSSI[a:b]
+        r["sf"] = sim.linkSF[a:b]
+        r["bw"] = sim.linkBW[a:b]
+        r["lost"] = sim.linkLost[a:b]
+        self.n = self.n + (b - a)
+        self.lastEnd[node.nodeid] = end
+
+    def flush(self):
+        self.buf[:self.n].tofile(self.f)
+        self.count = self.count + self.n
+        self.n = 0
+
+    # write the last records and the description
+    def close(self):
+        self.flush()
+        self.f.close()
+        self.meta["records"] = self.count
+        with open(self.fname + ".json", "w") as f:
+            json.dump(self.meta, f, indent=1, sort_keys=True)
+
+#
+# description and records (memory mapped) of a trace
+#
+def read(fname):
+    with open(fname + ".json") as f:
+        meta = json.load(f)
+    dtype = np.dtype([tuple(d) for d in meta["recordType"]])
+    if meta["records"] == 0:
+        return meta, np.zeros(0, dtype=dtype)
+    return meta, np.memmap(fname, dtype=dtype, mode="r", shape=(meta["records"],))
+
+#
+# counters of an evaluation, as those of loraSim.Results
+#
+class Evaluation():
+    def __init__(self, nrBS):
+        self.sent = 0
+        self.nrCollisions = 0
+        self.nrReceived = 0
+        self.nrProcessed = 0
+        self.nrLost = 0
+        self.receivedPerBS = [0] * nrBS
+
+    def der(self):
+        if not self.sent:
+            return float("nan")
+        return self.nrReceived / float(self.sent)
+
+#
+# count the records that are done, received transmissions by seq
+#
+def count(res, meta, r, collided, processed, bs):
+    counted = r["end"] < meta["simtime"]
+    lost = r["lost"] == 1
+    coll = counted & ~lost & (collided == 1)
+    proc = counted & ~lost & (processed == 1)
+    res.nrLost += int(np.count_nonzero(counted & lost))
+    res.nrCollisions += int(np.count_nonzero(coll))
+    res.nrProcessed += int(np.count_nonzero(proc))
+    if meta["multiBS"]:
+        # received at a base station with a demodulator path, counted once
+        # per transmission
+        rec = proc & (collided == 0)
+        res.receivedPerBS[bs] += int(np.count_nonzero(rec))
+        return r["seq"][rec]
+    rec = counted & ~lost & (collided == 0)
+    res.receivedPerBS[bs] += int(np.count_nonzero(rec))
+    res.nrReceived += int(np.count_nonzero(rec))
+    return r["seq"][:0]
+
+#
+# resolve the collisions of a trace (from read()) again, with the given
+# rules (None: those of the run)
+#
+def evaluate(meta, records, full_collision=None, threshold=None, Npream=None,
+             maxBSReceives=None, chunk=chunkSize):
+    if full_collision is None:
+        full_collision = meta["full_collision"]
+    if threshold is None:
+        threshold = meta["threshold"]
+    if Npream is None:
+        Npream = meta["preamble"]
+    if maxBSReceives is None:
+        maxBSReceives = meta["maxBSReceives"]
+    nrBS = meta["nrBS"]
+    res = Evaluation(nrBS)
+    n = len(records)
+    if n == 0:
+        return res
+    # seq only grows and a transmission is never split between chunks, so
+    # the transmissions are counted chunk by chunk
+
+    # per base station, the records in the air at the end of the last
+    # chunk, with their collided and processed flags
+    carry = [(records[:0].copy(), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int8))
+             for b in range(0, nrBS)]
+    a = 0
+    while a < n:
+        b = min(a + chunk, n)
+        if b < n:
+            # the packets of a transmission stay together
+            seq = records["seq"]
+            b = int(np.searchsorted(seq, seq[b], "left"))
+            if b <= a:
+                b = int(np.searchsorted(seq, seq[a], "right"))
+        c = np.array(records[a:b])
+        res.sent += int(np.count_nonzero(np.diff(c["seq"]))) + 1
+        # packets that end before the next chunk starts can not be hit any more
+        t1 = float(records["start"][b]) if b < n else float("inf")
+        if not meta["multiBS"]:
+            # lost packets never reach the base station
+            lost = c["lost"] == 1
+            count(res, meta, c[lost], np.zeros(int(np.count_nonzero(lost)), dtype=np.int8),
+                  np.zeros(int(np.count_nonzero(lost)), dtype=np.int8), 0)
+            c = c[~lost]
+        received = []
+        order = np.argsort(c["bs"], kind="mergesort")
+        bounds = np.searchsorted(c["bs"][order], np.arange(nrBS + 1), "left")
+        for g in range(0, nrBS):
+            new = c[order[bounds[g]:bounds[g+1]]]
+            old, oldColl, oldProc = carry[g]
+            if len(new) == 0 and len(old) == 0:
+                continue
+            r = np.concatenate((old, new))
+            first = len(old)
+            collided = np.concatenate((oldColl, np.zeros(len(new), dtype=np.int8)))
+            processed = np.concatenate((oldProc, np.zeros(len(new), dtype=np.int8)))
+            reach = r["lost"] == 0
+            if len(new):
+                start = r["start"]
+                loraBatch.resolveCollisions(start, r["end"], r["prev"], r["sf"], r["bw"],
+                                            r["freq"], r["rssi"], collided, first, full_collision,
+                                            checked=reach, signal_end=start + r["airtime"],
+                                            threshold=threshold, Npream=Npream)
+                # only the packets that reach the base station take a path
+                p = processed[reach]
+                loraBatch.resolveProcessing(start[reach], r["end"][reach], r["prev"][reach], p,
+                                            int(np.count_nonzero(reach[:first])), maxBSReceives)
+                processed[reach] = p
+            done = r["end"] < t1
+            received.append(count(res, meta, r[done], collided[done], processed[done], g))
+            keep = ~done
+            carry[g] = (r[keep], collided[keep], processed[keep])
+        if meta["multiBS"] and received:
+            res.nrReceived += int(len(np.unique(np.concatenate(received))))
+        a = b
+    return res
+
+def floatList(s):
+    return [float(v) for v in s.split(",")]
+
+def intList(s):
+    return [int(v) for v in s.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(usage="./loraTrace.py <trace> [options]")
+    parser.add_argument("trace")
+    parser.add_argument("--collision", type=intList)
+    parser.add_argument("--threshold", type=floatList)
+    parser.add_argument("--preamble", type=intList)
+    parser.add_argument("--paths", type=intList)
+    parser.add_argument("--chunk", type=int, default=chunkSize)
+    args = parser.parse_args()
+
+    meta, records = read(args.trace)
+    print ("{}: {} records, {} base stations, {} seed {}".format(
+        args.trace, len(records), meta["nrBS"], meta["simulation"], meta["seed"]))
+    print ("#collision threshold preamble paths sent collisions received processed lost der")
+    for fc, th, pre, paths in itertools.product(
+            args.collision or [int(meta["full_collision"])], args.threshold or [meta["threshold"]],
+            args.preamble or [meta["preamble"]], args.paths or [meta["maxBSReceives"]]):
+        res = evaluate(meta, records, bool(fc), th, pre, paths, args.chunk)
+        print ("{} {} {} {} {} {} {} {} {} {:.6g}".format(fc, th, pre, paths, res.sent,
+               res.nrCollisions, res.nrReceived, res.nrProcessed, res.nrLost, res.der()))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,12 @@
 #!/bin/bash
 
-# script that lists all the items in the current folder
+# script that runs 10 replications of loraDir.py, in parallel on all cores
+# (see loraRunner.py for sweeps, seeds and the other options)
 nodes=100 			#number of nodes to simulate
 avgsend=1000			#average sending interval in ms
 experiment=0 			#simulation radio settings 0 --> SF12 - BW125 - CR4/8
 simtime=10000			#total running time in ms
-for i in `seq 1 10`;
-do
-	echo =========================================
-	echo Simulation : $i
-	echo -----------------------------------------
-	python loraDir.py $nodes $avgsend $experiment $simtime
-done
-
+reps=10				#number of replications
+seed=12345			#root seed of the replications
 
+python loraRunner.py $nodes $avgsend $experiment $simtime --reps $reps --seed $seed "$@"
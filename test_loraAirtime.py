@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: regression tests of loraAirtime.py
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Run with pytest:
+        > python -m pytest -q test_loraAirtime.py
+"""
+
+import math
+import numpy as np
+import loraAirtime
+from loraAirtime import airtime
+from loraSim import sensi
+
+#
+# best setting of one packet as the original loraDir.py found it, None
+# when the base station can not be reached
+#
+def bestLoop(prx, plen):
+    minairtime = 9999
+    for i in range(0,6):
+        for j in range(1,4):
+            if (sensi[i,j] < prx):
+                sf = int(sensi[i,0])
+                bw = [125, 250, 500][j-1]
+                at = airtime(sf, 1, plen, bw)
+                if at < minairtime:
+                    minairtime = at
+                    minsf = sf
+                    minbw = bw
+                    minsensi = sensi[i, j]
+    if minairtime == 9999:
+        return None
+    return minsf, minbw, minairtime, minsensi
+
+#
+# every sensitivity level (a tie with the strict < of the loop), just
+# above and below it, out of reach and random levels in between
+#
+def test_resolve():
+    levels = np.unique(sensi[:, 1:4])
+    prx = np.concatenate((levels, levels - 1e-9, levels + 1e-9, [-200.0, 0.0],
+                          np.random.RandomState(1).uniform(-140, -100, 1000)))
+    for plen in [20, 50]:
+        sf, bw, at, minsensi = loraAirtime.bestSetting(sensi, 1, plen).resolve(prx)
+        for k in range(0, len(prx)):
+            best = bestLoop(prx[k], plen)
+            if best is None:
+                assert sf[k] == 0
+            else:
+                assert (sf[k], bw[k], at[k], minsensi[k]) == best
+
+#
+# experiment 5, the txpower as the original loraDir.py reduced it
+#
+def test_reduceTxPow():
+    prx = np.random.RandomState(2).uniform(-137, -100, 1000)
+    minsensi = loraAirtime.bestSetting(sensi, 1, 20).resolve(prx)[3]
+    txpow = loraAirtime.reduceTxPow(14, prx, minsensi)
+    for k in range(0, len(prx)):
+        assert txpow[k] == max(2, 14 - math.floor(prx[k] - minsensi[k]))
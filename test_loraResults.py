@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: regression tests of loraResults.py
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Run with pytest:
+        > python -m pytest -q test_loraResults.py
+"""
+
+import os
+import json
+import errno
+import socket
+import subprocess
+import sys
+import pytest
+import loraResults
+
+def shard(directory, runid):
+    with open(os.path.join(directory, runid + ".json"), "w") as f:
+        json.dump({"id": runid, "time": 1.0, "der": 0.5}, f)
+
+def writeLock(lock, content):
+    with open(lock, "w") as f:
+        f.write(content)
+
+# a process id that no longer runs
+def deadPid():
+    p = subprocess.Popen([sys.executable, "-c", "pass"])
+    p.wait()
+    return p.pid
+
+def test_stale_lock_is_broken(tmpdir):
+    d = str(tmpdir)
+    lock = os.path.join(d, ".merge.lock")
+    shard(d, "a")
+    writeLock(lock, "{} {}".format(socket.gethostname(), deadPid()))
+    assert loraResults.merge(d) == 1
+    assert not os.path.exists(lock)
+    assert list(loraResults.load(d)["id"]) == ["a"]
+
+def test_live_lock_is_kept(tmpdir):
+    d = str(tmpdir)
+    lock = os.path.join(d, ".merge.lock")
+    shard(d, "a")
+    writeLock(lock, "{} {}".format(socket.gethostname(), os.getpid()))
+    with pytest.raises(OSError) as e:
+        loraResults.merge(d)
+    assert e.value.errno == errno.EEXIST
+    assert os.path.exists(os.path.join(d, "a.json"))
+
+#
+# two merges find the same stale lock, the other one breaks it and takes a
+# fresh lock before this one gets to break it: the fresh lock must stay
+#
+def test_fresh_lock_is_not_broken(tmpdir, monkeypatch):
+    d = str(tmpdir)
+    lock = os.path.join(d, ".merge.lock")
+    shard(d, "a")
+    writeLock(lock, "{} {}".format(socket.gethostname(), deadPid()))
+    staleMerge = loraResults.staleMerge
+    def otherMerge(holder):
+        stale = staleMerge(holder)
+        os.remove(lock)
+        writeLock(lock, "otherhost 1 2.0")
+        return stale
+    monkeypatch.setattr(loraResults, "staleMerge", otherMerge)
+    with pytest.raises(OSError) as e:
+        loraResults.merge(d)
+    assert e.value.errno == errno.EEXIST
+    with open(lock) as f:
+        assert f.read() == "otherhost 1 2.0"
+    assert sorted(os.listdir(d)) == [".merge.lock", "a.json"]
+
+#
+# a merge that died after publishing runs.npz left its shards behind
+#
+def test_merged_shard_counts_once(tmpdir):
+    d = str(tmpdir)
+    shard(d, "a")
+    shard(d, "b")
+    assert loraResults.merge(d) == 2
+    shard(d, "b")
+    assert sorted(loraResults.load(d)["id"]) == ["a", "b"]
+    assert loraResults.merge(d) == 0
+    assert sorted(loraResults.load(d)["id"]) == ["a", "b"]
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+ LoRaSim 0.2.1: regression tests of loraSim.py
+ Copyright © 2016-2017 Thiemo Voigt <thiemo@sics.se> and Martin Bor <m.bor@lancaster.ac.uk>
+
+ This work is licensed under the Creative Commons Attribution 4.0
+ International License. To view a copy of this license,
+ visit http://creativecommons.org/licenses/by/4.0/.
+"""
+
+"""
+ DESCRIPTION:
+    Run with pytest:
+        > python -m pytest -q test_loraSim.py
+"""
+
+import pytest
+from loraSim import Scenario, Simulation, MultiBSSimulation, DirectionalSimulation
+
+def counters(res):
+    return (res.sent, res.nrCollisions, res.nrReceived, res.nrProcessed, res.nrLost,
+            list(res.receivedPerBS))
+
+#
+# every transmission in the air at base station bs, as a linear scan
+# without the CollisionIndex would see them
+#
+def inAir(sim, bs):
+    return [item for key, bucket in sim.activeTx.buckets.items() if key[0] == bs
+            for item in bucket]
+
+class LinearSimulation(Simulation):
+    def checkcollision(self, packet):
+        self.checks = self.checks + 1
+        return self.collide(packet, [node.packet for node in inAir(self, packet.bs)])
+
+class LinearMultiBSSimulation(MultiBSSimulation):
+    def checkcollision(self, packet):
+        self.checks = self.checks + 1
+        if packet.lost:
+            return 0
+        return self.collide(packet, inAir(self, packet.bs))
+
+#
+# every lost link in the air, without pruning the ones too weak to collide
+#
+class UnprunedSimulation(DirectionalSimulation):
+    def interferers(self):
+        return self.linkLost.copy()
+
+#
+# the negative antenna gains take packets that reach their base station
+# below the sensitivity, the lost links within powerThreshold of them must
+# stay in the air
+#
+def test_directional_pruning():
+    for seed in [1, 2, 3]:
+        res = []
+        for cls in [DirectionalSimulation, UnprunedSimulation]:
+            sc = Scenario(100, 2000000, 0, 20000000, full_collision=True, seed=seed, nrBS=7,
+                          layout="hex", links="all", directionality=1, engine="heap")
+            res.append(cls(sc).run())
+        pruned, unpruned = res
+        assert pruned.nrCollisions == unpruned.nrCollisions
+        assert pruned.nrReceived == unpruned.nrReceived
+        assert pruned.nrLost == unpruned.nrLost
+        assert list(pruned.receivedPerBS) == list(unpruned.receivedPerBS)
+
+#
+# the CollisionIndex only leaves out packets that can not collide: the
+# counters equal those of a linear scan over all packets at the BS
+#
+def test_collision_index():
+    for fc in [False, True]:
+        for cls, linear, options in [(Simulation, LinearSimulation, {}),
+                                     (MultiBSSimulation, LinearMultiBSSimulation, {"nrBS": 4})]:
+            res = []
+            for c in [cls, linear]:
+                sc = Scenario(200, 100000, 1, 2000000, full_collision=fc, seed=3, minDist=0,
+                              engine="heap", **options)
+                res.append(c(sc).run())
+            indexed, scanned = res
+            assert counters(indexed) == counters(scanned)
+            assert indexed.comparisons < scanned.comparisons
+
+#
+# the heap engine processes the same events in the same order as SimPy
+#
+@pytest.mark.parametrize("experiment", [0, 1, 3, 5])
+@pytest.mark.parametrize("aloha", ["pure", "slotted"])
+@pytest.mark.parametrize("fc", [False, True])
+def test_heap_engine(experiment, aloha, fc):
+    res = []
+    for engine in ["simpy", "heap"]:
+        sc = Scenario(100, 100000, experiment, 2000000, full_collision=fc, seed=5, minDist=0,
+                      aloha=aloha, engine=engine)
+        res.append(Simulation(sc).run())
+    assert counters(res[0]) == counters(res[1])
+    assert res[0].energy == res[1].energy
+
+#
+# the slot engine resolves the slots at once, and the packets longer than
+# a slot (SF12 of experiments 0 and 4 with 1 s slots) as loraBatch does:
+# the same counters as the heap engine
+#
+@pytest.mark.parametrize("experiment", [0, 1, 2, 4])
+@pytest.mark.parametrize("guard", [0, 250])
+@pytest.mark.parametrize("fc", [False, True])
+def test_slot_engine(experiment, guard, fc):
+    res = []
+    for engine in ["heap", "slots"]:
+        sc = Scenario(200, 100000, experiment, 2000000, full_collision=fc, seed=9, minDist=0,
+                      aloha="slotted", guardTime=guard, maxBSReceives=3, engine=engine)
+        res.append(Simulation(sc).run())
+    assert counters(res[0]) == counters(res[1])